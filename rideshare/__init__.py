@@ -0,0 +1,4 @@
+"""Ride-sharing app: passengers book seats on trips run by drivers.
+
+Submodules are imported on demand, so importing the package itself is cheap.
+"""
@@ -0,0 +1,268 @@
+"""Admission control for login and booking bursts, shared by every session."""
+import json
+import os
+import time
+from contextlib import contextmanager
+
+from .records import file_lock
+
+SLOT_LEASE = 60.0  # Seconds after which a held slot is treated as left by a crashed session
+
+
+class SharedState:
+    """A small JSON document shared by every session, changed under a file lock.
+
+    Each interactive session is its own process, so limits kept in memory
+    would apply per session; keeping them here makes them hold for the app as
+    a whole.
+    """
+    def __init__(self, filename):
+        self.filename = filename
+
+    def read(self):
+        try:
+            with open(self.filename, "r") as file:
+                return json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    @contextmanager
+    def update(self):
+        """Yield the current state to change in place; it is written back when the block ends."""
+        with file_lock(self.filename):
+            state = self.read()
+            yield state
+            temp_path = self.filename + ".tmp"
+            with open(temp_path, "w") as file:
+                json.dump(state, file)
+            os.replace(temp_path, self.filename)
+
+
+class TokenBucket:
+    """Holds up to `burst` tokens, refilled at `rate` per second; each request takes one."""
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate, burst, now):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, now):
+        self.refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class RateLimiter:
+    """Token buckets per key (user or source), stored as {key: [tokens, updated]}.
+
+    A bucket that has refilled completely is the same as a new one, so it is
+    dropped; at most maxsize partly used buckets are kept, oldest dropped first.
+    """
+    def __init__(self, rate, burst, maxsize=10000):
+        self.rate = rate
+        self.burst = burst
+        self.maxsize = maxsize
+
+    def allow(self, buckets, key, now):
+        bucket = TokenBucket(self.rate, self.burst, now)
+        if key in buckets:
+            bucket.tokens, bucket.updated = buckets.pop(key)  # Re-inserted below as the most recent
+        allowed = bucket.take(now)
+        for other in [other for other in buckets if self._full(buckets[other], now)]:
+            del buckets[other]
+        buckets[key] = [bucket.tokens, bucket.updated]
+        while len(buckets) > self.maxsize:
+            del buckets[next(iter(buckets))]  # A forgotten key starts again with a full bucket
+        return allowed
+
+    def _full(self, stored, now):
+        bucket = TokenBucket(self.rate, self.burst, now)
+        bucket.tokens, bucket.updated = stored
+        bucket.refill(now)
+        return bucket.tokens >= self.burst
+
+
+class ConcurrencyLimiter:
+    """At most `limit` operations at once; a bounded queue waits for a slot and the rest is shed.
+
+    Held slots and queued requests are stored as [pid, since] entries, so a
+    session that crashes while holding one only blocks it for SLOT_LEASE.
+    """
+    def __init__(self, limit, max_waiting, timeout, poll=0.01):
+        self.limit = limit
+        self.max_waiting = max_waiting
+        self.timeout = timeout  # Longest a queued request waits for a slot, in seconds
+        self.poll = poll
+
+    @staticmethod
+    def live(entries, now):
+        entries[:] = [entry for entry in entries if now - entry[1] < SLOT_LEASE]
+        return entries
+
+    def try_acquire(self, state, started, now, queued):
+        """Take a slot in `state` (the operation's entry); return "admitted", "queued" or "shed"."""
+        slots = self.live(state.setdefault("slots", []), now)
+        waiting = self.live(state.setdefault("waiting", []), now)
+        if len(slots) < self.limit:
+            if queued:
+                self.leave(waiting)
+            slots.append([os.getpid(), now])
+            return "admitted"
+        if not queued:
+            if len(waiting) >= self.max_waiting:
+                return "shed"  # Queue full: shed at once instead of piling up
+            waiting.append([os.getpid(), now])
+            return "queued"
+        if now - started >= self.timeout:
+            self.leave(waiting)
+            return "shed"
+        return "queued"
+
+    def has_free_slot(self, state, now):
+        return len(self.live(list(state.get("slots", [])), now)) < self.limit
+
+    @staticmethod
+    def leave(entries):
+        """Drop one entry of this process (its threads' entries are interchangeable)."""
+        pid = os.getpid()
+        for i, entry in enumerate(entries):
+            if entry[0] == pid:
+                del entries[i]
+                return
+
+
+class AdmissionController:
+    """Admission control in front of authentication and booking.
+
+    A request must pass its user's token bucket and its source's token bucket,
+    and then get one of the operation's concurrency slots. Rejections are cheap,
+    so a burst is turned away before it reaches the data files. Buckets, slots
+    and metrics live in admission.json under a file lock, so the limits apply
+    across all sessions and metrics() (the `admission-metrics` command) reports
+    on all of them.
+    """
+    POLICIES = {
+        # Rates are tokens per second
+        "login": {"user_rate": 0.2, "user_burst": 5, "source_rate": 5.0, "source_burst": 20,
+                  "concurrency": 8, "max_waiting": 32, "timeout": 2.0},
+        "booking": {"user_rate": 0.5, "user_burst": 5, "source_rate": 20.0, "source_burst": 50,
+                    "concurrency": 16, "max_waiting": 64, "timeout": 5.0},
+    }
+    REJECTION_MESSAGES = {
+        "user_rate": "Too many attempts for this account. Please wait a moment and try again.",
+        "source_rate": "Too many requests from this connection. Please wait a moment and try again.",
+        "overloaded": "The service is busy right now. Please try again shortly.",
+    }
+
+    def __init__(self, policies=None, filename="admission.json", clock=time.time, wait_samples=200):
+        self.policies = policies or self.POLICIES
+        self.state = SharedState(filename)
+        self.clock = clock  # Wall clock: the timestamps are compared across processes
+        self.wait_samples = wait_samples
+        self._limits = {}
+        for operation, policy in self.policies.items():
+            self._limits[operation] = (
+                RateLimiter(policy["user_rate"], policy["user_burst"]),
+                RateLimiter(policy["source_rate"], policy["source_burst"]),
+                ConcurrencyLimiter(policy["concurrency"], policy["max_waiting"], policy["timeout"]),
+            )
+
+    def _entry(self, state, operation):
+        return state.setdefault(operation, {
+            "users": {}, "sources": {}, "slots": [], "waiting": [], "admitted": 0,
+            "rejected": {"user_rate": 0, "source_rate": 0, "overloaded": 0},
+            "queue_waits": [],  # Seconds, most recent admissions
+        })
+
+    def acquire(self, operation, user=None, source="local"):
+        """Return None when admitted (call release() when done), otherwise the rejection reason.
+
+        A user or source of None skips that rate limit; in-process callers pass
+        neither and only take a concurrency slot.
+        """
+        user_limits, source_limits, concurrency = self._limits[operation]
+        started = self.clock()
+        with self.state.update() as state:
+            entry = self._entry(state, operation)
+            if user is not None and not user_limits.allow(entry["users"], user, started):
+                return self._reject(entry, "user_rate")
+            if source is not None and not source_limits.allow(entry["sources"], source, started):
+                return self._reject(entry, "source_rate")
+            outcome = concurrency.try_acquire(entry, started, started, queued=False)
+            if outcome != "queued":
+                return self._finish(entry, outcome, 0.0)
+
+        while True:
+            time.sleep(concurrency.poll)
+            now = self.clock()
+            if not concurrency.has_free_slot(self.state.read().get(operation, {}), now) \
+                    and now - started < concurrency.timeout:
+                continue  # Checked without the lock; only a likely change takes it
+            with self.state.update() as state:
+                entry = self._entry(state, operation)
+                outcome = concurrency.try_acquire(entry, started, self.clock(), queued=True)
+                if outcome != "queued":
+                    return self._finish(entry, outcome, self.clock() - started)
+
+    def _finish(self, entry, outcome, waited):
+        if outcome == "shed":
+            return self._reject(entry, "overloaded")
+        entry["admitted"] += 1
+        entry["queue_waits"] = (entry["queue_waits"] + [waited])[-self.wait_samples:]
+        return None
+
+    @staticmethod
+    def _reject(entry, reason):
+        entry["rejected"][reason] += 1
+        return reason
+
+    def release(self, operation):
+        with self.state.update() as state:
+            ConcurrencyLimiter.leave(self._entry(state, operation)["slots"])
+
+    @contextmanager
+    def admit(self, operation, user=None, source="local"):
+        """Yield None while admitted, or the rejection reason (the block should then do nothing)."""
+        reason = self.acquire(operation, user, source)
+        try:
+            yield reason
+        finally:
+            if reason is None:
+                self.release(operation)
+
+    def metrics(self):
+        """Return admitted/rejected counts, current load and recent queue waits per operation."""
+        state = self.state.read()
+        now = self.clock()
+        report = {}
+        for operation in self.policies:
+            entry = self._entry(state, operation)
+            waits = sorted(entry["queue_waits"])
+            report[operation] = {
+                "admitted": entry["admitted"],
+                "rejected": dict(entry["rejected"]),
+                "active": len(ConcurrencyLimiter.live(entry["slots"], now)),
+                "waiting": len(ConcurrencyLimiter.live(entry["waiting"], now)),
+                "queue_wait_ms": {
+                    "avg": sum(waits) / len(waits) * 1000 if waits else 0.0,
+                    "p95": waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000 if waits else 0.0,
+                    "max": waits[-1] * 1000 if waits else 0.0,
+                },
+            }
+        return report
+
+
+def request_source():
+    """Where requests come from: the SSH client address for remote sessions, otherwise "local"."""
+    return os.environ.get("RIDESHARE_SOURCE") or (os.environ.get("SSH_CLIENT", "").split() or ["local"])[0]
+
+
+admission_control = AdmissionController()
@@ -0,0 +1,271 @@
+"""Command-line entry point and the startup sequence of the interactive app.
+
+Only storage is imported up front; every command imports what it needs, and
+optional subsystems such as analytics load on first use.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from .storage import TripCompactor, trip_store
+
+
+def initialize_json_files():
+    """Ensure all required JSON files exist."""
+    json_files = ["drivers.json", "passengers.json"]
+
+    for file_name in json_files:
+        if not os.path.exists(file_name):
+            with open(file_name, "w") as file:
+                json.dump([], file)  # Initialize with an empty list
+
+    # Trips live in sharded files rather than a single trips.json
+    trip_store._ensure_layout()
+
+
+class StartupTimer:
+    """Startup milestones in milliseconds since the entry script started.
+
+    One JSON line per run is appended to startup_metrics.jsonl once every
+    milestone in `milestones` is reached, so startup time can be tracked over
+    releases with `startup-report`.
+    """
+    def __init__(self, started=None, filename="startup_metrics.jsonl", milestones=("first_menu", "warm")):
+        self.started = started if started is not None else time.perf_counter()
+        self.filename = filename
+        self.milestones = milestones
+        self.marks = {}
+        self._written = False
+        self._lock = threading.Lock()
+
+    def mark(self, name):
+        """Record a milestone, writing the run's metrics once all milestones are in."""
+        with self._lock:
+            self.marks[name] = round((time.perf_counter() - self.started) * 1000, 1)
+            if not all(milestone in self.marks for milestone in self.milestones):
+                return
+        self.flush()
+
+    def flush(self):
+        """Write the milestones reached so far, once per run (e.g. on exit before warm-up ends)."""
+        with self._lock:
+            if self._written:
+                return
+            self._written = True
+            entry = {"recorded_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), **self.marks}
+        try:
+            with open(self.filename, "a") as file:
+                file.write(json.dumps(entry) + "\n")
+        except OSError as e:
+            print(f"Error saving startup metrics: {e}")
+
+
+def startup_report(filename="startup_metrics.jsonl", runs=20):
+    """Print the median, best and worst of each startup milestone over recent runs."""
+    import statistics  # Only needed here; keeps it off the startup path
+
+    try:
+        with open(filename, "r") as file:
+            entries = [json.loads(line) for line in file if line.strip()][-runs:]
+    except (FileNotFoundError, json.JSONDecodeError):
+        entries = []
+    if not entries:
+        print("No startup metrics recorded yet. Start the app once to record some.")
+        return
+
+    print(f"Startup milestones over the last {len(entries)} run(s), in ms:")
+    print(f"{'Milestone':<12} {'Median':>8} {'Best':>8} {'Worst':>8}")
+    for milestone in ("imported", "initialized", "first_menu", "warm"):
+        values = [entry[milestone] for entry in entries if milestone in entry]
+        if values:
+            print(f"{milestone:<12} {statistics.median(values):>8.1f} {min(values):>8.1f} {max(values):>8.1f}")
+
+
+def warm_up(timer=None):
+    """Load the user records, driver availability and trip index once, off the menu thread."""
+    from .availability import driver_availability
+    from .query import trip_index
+    from .records import user_records
+
+    try:
+        user_records.warm("passengers.json", "drivers.json")
+        driver_availability.warm()
+        trip_index.warm()
+    except OSError as e:
+        print(f"Error warming up data: {e}")
+    if timer is not None:
+        timer.mark("warm")
+
+
+def main(argv=None, started=None):
+    """Run the interactive app, or a bulk import/export when a command is given.
+
+    started is the time.perf_counter() value from when the entry script began,
+    so cold start includes the package imports.
+    """
+    timer = StartupTimer(started)
+    timer.mark("imported")
+    parser = argparse.ArgumentParser(description="Ride-Sharing App")
+    commands = parser.add_subparsers(dest="command")
+    for command in ("import", "export"):
+        command_parser = commands.add_parser(command, help=f"Bulk {command} records as CSV or JSONL")
+        command_parser.add_argument("kind", choices=["passengers", "drivers", "trips"])
+        command_parser.add_argument("path", help="CSV (.csv) or JSON Lines file")
+        command_parser.add_argument("--chunk-size", type=int, default=1000)
+    bench_parser = commands.add_parser("bench-codecs", help="Compare storage codecs on trip records")
+    bench_parser.add_argument("--records", type=int, default=10000, help="Synthetic records when no trips are stored")
+    search_parser = commands.add_parser("search", help="Search trips with filters and pagination")
+    search_parser.add_argument("--passenger", dest="passenger_id")
+    search_parser.add_argument("--driver", dest="driver_id")
+    search_parser.add_argument("--status", action="append", help="Repeat to match several statuses")
+    search_parser.add_argument("--route", help="Text the route must contain")
+    search_parser.add_argument("--from", dest="start", help="Earliest start time, YYYY-MM-DD[ HH:MM:SS]")
+    search_parser.add_argument("--to", dest="end", help="Latest start time, YYYY-MM-DD[ HH:MM:SS]")
+    search_parser.add_argument("--min-fare", type=float)
+    search_parser.add_argument("--max-fare", type=float)
+    search_parser.add_argument("--page", type=int, default=1)
+    search_parser.add_argument("--page-size", type=int, default=20)
+    simulate_parser = commands.add_parser("simulate", help="Replay seeded city traffic on a simulated clock")
+    simulate_parser.add_argument("--seed", type=int, default=0)
+    simulate_parser.add_argument("--hours", type=int, default=24)
+    simulate_parser.add_argument("--drivers", type=int, default=40)
+    simulate_parser.add_argument("--passengers", type=int, default=400)
+    simulate_parser.add_argument("--peak-demand", type=int, default=120, help="Requests per hour at rush hour")
+    commands.add_parser("check", help="Cross-check drivers, passengers and trips")
+    commands.add_parser("repair", help="Rebuild driver trip lists and earnings from the trip records")
+    commands.add_parser("admission-metrics", help="Show admitted and rejected logins and bookings, load and queue waits")
+    report_parser = commands.add_parser("startup-report", help="Show tracked cold start and time-to-first-menu")
+    report_parser.add_argument("--runs", type=int, default=20, help="How many recent runs to summarize")
+    args = parser.parse_args(argv)
+
+    if args.command in ("import", "export"):
+        from .bulk import BulkLoader
+
+        loader = BulkLoader(args.chunk_size)
+        if args.command == "import":
+            loader.import_file(args.path, args.kind)
+        else:
+            loader.export_file(args.path, args.kind)
+    elif args.command == "search":
+        from .query import TripIndex, trip_index
+
+        end = args.end
+        if end and len(end) == 10:
+            end += " 23:59:59"  # A bare date includes the whole day
+        trips, has_more = trip_index.query(
+            passenger_id=args.passenger_id, driver_id=args.driver_id, status=args.status,
+            route=args.route, start=args.start, end=end, min_fare=args.min_fare,
+            max_fare=args.max_fare, page=args.page, page_size=args.page_size,
+        )
+        for trip in trips:
+            print(
+                f"{trip['trip_id']}  {trip['start_time']}  {trip['status']:<11}  "
+                f"{TripIndex.fare_of(trip):>8.2f} PHP  {trip['route']}"
+            )
+        print(f"Page {args.page}: {len(trips)} trip(s)" + (" (more available)" if has_more else ""))
+    elif args.command == "simulate":
+        from .simulation import CitySimulator
+
+        simulator = CitySimulator(
+            seed=args.seed, hours=args.hours, drivers=args.drivers,
+            passengers=args.passengers, peak_requests_per_hour=args.peak_demand,
+        )
+        rows = simulator.run()
+        if rows is not None:
+            print(
+                f"{'Hour':>4} {'Req':>5} {'Booked':>6} {'Pooled':>6} {'Cancel':>6} {'Gave up':>7} {'Done':>5} "
+                f"{'Util %':>6} {'Wait avg':>8} {'Wait max':>8} {'Seats %':>7} {'Reads':>6} {'Writes':>6}"
+            )
+            for row in rows:
+                print(
+                    f"{row['hour']:>4} {row['requests']:>5} {row['booked']:>6} {row['pooled']:>6} "
+                    f"{row['canceled']:>6} {row['abandoned']:>7} {row['completed']:>5} "
+                    f"{row['utilisation'] * 100:>6.1f} {row['avg_wait_minutes']:>8.1f} "
+                    f"{row['max_wait_minutes']:>8.1f} {row['seat_fill'] * 100:>7.1f} "
+                    f"{row['storage_reads']:>6} {row['storage_writes']:>6}"
+                )
+            print(
+                f"Simulated {args.hours} h in {simulator.wall_seconds:.1f} s "
+                f"({args.hours * 3600 / max(simulator.wall_seconds, 1e-9):.0f}x real time)."
+            )
+    elif args.command in ("check", "repair"):
+        from .consistency import consistency_checker
+
+        report = consistency_checker.check() if args.command == "check" else consistency_checker.repair()
+        print(
+            f"Checked {report['drivers']} driver(s), {report['passengers']} passenger(s) "
+            f"and {report['trips']} trip(s) in {report['seconds']:.2f} s."
+        )
+        for kind, count in report["issues"].items():
+            print(f"  {kind}: {count}")
+            for detail in report["samples"][kind]:
+                print(f"    - {detail}")
+        if not report["issues"]:
+            print("No inconsistencies found.")
+        if "repaired" in report:
+            print(f"Repaired {report['repaired']['drivers']} driver record(s) and {report['repaired']['trips']} trip(s).")
+    elif args.command == "admission-metrics":
+        from .admission import admission_control
+
+        print(f"{'Operation':<10} {'Admitted':>8} {'User rate':>9} {'Source rate':>11} {'Overloaded':>10} "
+              f"{'Active':>6} {'Waiting':>7} {'Wait avg':>8} {'Wait p95':>8} {'Wait max':>8}")
+        for operation, metrics in admission_control.metrics().items():
+            rejected, waits = metrics["rejected"], metrics["queue_wait_ms"]
+            print(
+                f"{operation:<10} {metrics['admitted']:>8} {rejected['user_rate']:>9} {rejected['source_rate']:>11} "
+                f"{rejected['overloaded']:>10} {metrics['active']:>6} {metrics['waiting']:>7} "
+                f"{waits['avg']:>8.1f} {waits['p95']:>8.1f} {waits['max']:>8.1f}"
+            )
+        print("Queue waits are in ms, over the most recent admissions.")
+    elif args.command == "startup-report":
+        startup_report(runs=args.runs)
+    elif args.command == "bench-codecs":
+        from .formats import benchmark_codecs
+        from .ids import id_allocator
+        from .models import Trip
+
+        records = trip_store.get_active_trips() + trip_store.get_finished_trips(include_closed=True)
+        if len(records) < args.records:
+            records = [
+                {
+                    "trip_id": id_allocator.next_trip_id(),
+                    "route": f"Zone {i % 50}",
+                    "distance": float(i % 40 + 1),
+                    "base_fare": Trip.calculate_base_fare(float(i % 40 + 1)),
+                    "driver_id": str(uuid.uuid4()),
+                    "passenger_groups": [{"passenger_id": str(uuid.uuid4()), "group_size": i % 4 + 1}],
+                    "available_seats": 3 - i % 4,
+                    "start_time": "2024-06-01 12:00:00",
+                    "status": ["pending", "completed", "canceled"][i % 3],
+                    "final_fare": None,
+                }
+                for i in range(args.records)
+            ]
+        print(f"{'Codec':<12} {'Bytes/record':>13} {'Encode us':>10} {'Decode us':>10}")
+        for result in benchmark_codecs(records):
+            print(
+                f"{result['codec']:<12} {result['bytes_per_record']:>13.1f} "
+                f"{result['encode_us_per_record']:>10.2f} {result['decode_us_per_record']:>10.2f}"
+            )
+    else:
+        from .menu import Menu
+        from .scheduler import trip_scheduler
+
+        initialize_json_files()
+        timer.mark("initialized")
+        # Indexes and caches are built once in the background; the menu does not wait for them
+        threading.Thread(target=warm_up, args=(timer,), name="startup-warm-up", daemon=True).start()
+        compactor = TripCompactor(trip_store)
+        compactor.start()  # Keep finished trips out of the hot shards in the background
+        trip_scheduler.start()  # Release advance bookings even while nobody uses the menus
+
+        print("Welcome to the Ride-Sharing App!")
+        timer.mark("first_menu")
+        try:
+            Menu.general_menu()
+        finally:
+            timer.flush()
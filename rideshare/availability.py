@@ -0,0 +1,176 @@
+"""Driver availability state machine used by dispatch."""
+import threading
+
+from .records import user_records
+from .storage import TripStore, trip_store
+
+
+class DriverAvailability:
+    """Driver shift state machine with an in-memory set of drivers that can take bookings.
+
+    Trip changes drive the transitions (TripStore.save_trips reports every saved
+    trip), so dispatch reads the available pools directly instead of scanning
+    drivers and trips on every booking. The pools keep drivers in the order
+    they entered them, so the driver waiting longest is picked first. Before
+    each dispatch query drivers.json is checked for changes (a stat while it
+    is unchanged), so sign-ups and shift changes saved by other sessions are
+    seen.
+    """
+    OFFLINE = "offline"
+    IDLE = "idle"  # Online with no active trips
+    EN_ROUTE = "en-route"  # Heading to pickups; pending trips still have free seats
+    FULL = "full"  # A pending trip has no free seats left
+    ON_TRIP = "on-trip"  # A trip is in progress
+    TRANSITIONS = {
+        OFFLINE: {IDLE, ON_TRIP},
+        IDLE: {OFFLINE, EN_ROUTE, FULL, ON_TRIP},
+        EN_ROUTE: {OFFLINE, IDLE, FULL, ON_TRIP},
+        FULL: {IDLE, EN_ROUTE, ON_TRIP},
+        ON_TRIP: {IDLE, EN_ROUTE, FULL},
+    }
+
+    def __init__(self, filename="drivers.json"):
+        self.filename = filename
+        self._states = {}  # driver_id -> state
+        self._records = {}  # driver_id -> stored driver record
+        self._trips = {}  # driver_id -> {trip_id: (status, free seats)} for active trips
+        self._idle = {}  # driver_id -> None, in arrival order; preferred for dispatch
+        self._en_route = {}
+        self._seen_records = None  # The drivers.json record list last applied
+        self._stored_states = {}  # driver_id -> state field in that list
+        self._warm = False
+        self._lock = threading.RLock()
+
+    def warm(self):
+        """Build the states once from drivers.json and the active trip shards."""
+        with self._lock:
+            if self._warm:
+                return
+            self._warm = True
+            for trip in trip_store.get_active_trips():
+                self._track(trip)
+            self._refresh()
+
+    def _refresh(self):
+        """Apply drivers.json if it changed: new drivers, and shifts started or ended by other sessions."""
+        drivers = user_records.all(self.filename)
+        if drivers is self._seen_records:
+            return
+        self._seen_records = drivers
+        for record in drivers:
+            driver_id = record["id"]
+            self._records[driver_id] = record
+            stored, previous = record.get("state"), self._stored_states.get(driver_id)
+            self._stored_states[driver_id] = stored
+            if driver_id not in self._states:
+                self._set_state(driver_id, self.OFFLINE if stored == self.OFFLINE else self._derive(driver_id))
+            elif stored == previous:
+                continue  # This driver's shift did not change in the file
+            elif stored == self.OFFLINE:
+                self._set_state(driver_id, self.OFFLINE)
+            elif self._states[driver_id] == self.OFFLINE:
+                self._set_state(driver_id, self.IDLE)
+                self._set_state(driver_id, self._derive(driver_id))
+
+    def _track(self, trip):
+        trips = self._trips.setdefault(trip["driver_id"], {})
+        if trip.get("status") in TripStore.ACTIVE_STATUSES:
+            trips[trip["trip_id"]] = (trip["status"], trip.get("available_seats", 0))
+        else:
+            trips.pop(trip["trip_id"], None)
+
+    def _derive(self, driver_id):
+        """Return the state implied by the driver's active trips."""
+        trips = self._trips.get(driver_id, {}).values()
+        if any(status == "in-progress" for status, _ in trips):
+            return self.ON_TRIP
+        if any(free <= 0 for _, free in trips):
+            return self.FULL
+        return self.EN_ROUTE if trips else self.IDLE
+
+    def _set_state(self, driver_id, state):
+        current = self._states.get(driver_id)
+        if current == state:
+            return True  # Keep the driver's place in its pool
+        if current is not None and state not in self.TRANSITIONS[current]:
+            return False
+        self._states[driver_id] = state
+        self._idle.pop(driver_id, None)
+        self._en_route.pop(driver_id, None)
+        if state == self.IDLE:
+            self._idle[driver_id] = None
+        elif state == self.EN_ROUTE:
+            self._en_route[driver_id] = None
+        return True
+
+    # --- Events ---
+
+    def on_trip_saved(self, trip):
+        """Move the trip's driver to the state its active trips now imply."""
+        with self._lock:
+            self.warm()
+            self._track(trip)
+            driver_id = trip["driver_id"]
+            if driver_id not in self._records:
+                return  # Trip for an unknown driver
+            state = self._derive(driver_id)
+            if self._states.get(driver_id) == self.OFFLINE and state != self.ON_TRIP:
+                return  # Stays offline until the driver goes online
+            self._set_state(driver_id, state)
+
+    def register(self, record):
+        """Track a new or updated driver record."""
+        with self._lock:
+            self.warm()
+            self._records[record["id"]] = record
+            self._stored_states[record["id"]] = record.get("state")
+            if record["id"] not in self._states:
+                self._set_state(record["id"], self._derive(record["id"]))
+
+    def go_online(self, driver_id):
+        with self._lock:
+            self.warm()
+            if self._states.get(driver_id) != self.OFFLINE:
+                return True
+            self._set_state(driver_id, self.IDLE)  # Offline -> idle, then settle on the trips' state
+            return self._set_state(driver_id, self._derive(driver_id))
+
+    def go_offline(self, driver_id):
+        with self._lock:
+            self.warm()
+            return self._set_state(driver_id, self.OFFLINE)
+
+    # --- Queries ---
+
+    def state_of(self, driver_id):
+        with self._lock:
+            self.warm()
+            return self._states.get(driver_id, self.IDLE)
+
+    def pick(self, exclude=()):
+        """Return the record of the longest-waiting available driver in O(1), preferring idle drivers.
+
+        Drivers in `exclude` (e.g. ones matched to bookings not saved yet) are skipped.
+        """
+        with self._lock:
+            self.warm()
+            self._refresh()
+            for pool in (self._idle, self._en_route):
+                for driver_id in pool:
+                    if driver_id not in exclude:
+                        return self._records[driver_id]
+            return None
+
+    def available_drivers(self):
+        """Return (record, active trip count) for every driver that can take a booking."""
+        with self._lock:
+            self.warm()
+            self._refresh()
+            return [
+                (self._records[driver_id], len(self._trips.get(driver_id, {})))
+                for driver_id in [*self._idle, *self._en_route]
+            ]
+
+
+driver_availability = DriverAvailability()
+trip_store.add_listener(driver_availability.on_trip_saved)
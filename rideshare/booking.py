@@ -0,0 +1,80 @@
+"""Idempotency ledger for bookings and cancellations."""
+import json
+import os
+import threading
+from collections import OrderedDict
+
+
+class BookingLedger:
+    """Bounded idempotency table for booking and cancellation requests.
+
+    Each key moves from "started" (with the trip it touches) to "done" (with
+    its result). Entries are journaled to an append-only file; only the most
+    recent maxsize keys are kept.
+    """
+    def __init__(self, filename="booking_ledger.jsonl", maxsize=10000):
+        self.filename = filename
+        self.maxsize = maxsize
+        self._entries = None  # key -> entry, oldest first
+        self._journal_lines = 0
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._entries is not None:
+            return
+        self._entries = OrderedDict()
+        try:
+            with open(self.filename, "r") as file:
+                for line in file:
+                    try:
+                        key, entry = json.loads(line)
+                    except (json.JSONDecodeError, ValueError):
+                        continue  # Skip a torn final line
+                    self._entries[key] = entry
+                    self._entries.move_to_end(key)
+                    self._journal_lines += 1
+        except FileNotFoundError:
+            pass
+        self._trim()
+
+    def _trim(self):
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def _write(self, key, entry):
+        self._load()
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        self._trim()
+        with open(self.filename, "a") as file:
+            file.write(json.dumps([key, entry]) + "\n")
+        self._journal_lines += 1
+        if self._journal_lines > 2 * self.maxsize:
+            # Compact the journal down to the live entries
+            temp_path = self.filename + ".tmp"
+            with open(temp_path, "w") as file:
+                for live_key, live_entry in self._entries.items():
+                    file.write(json.dumps([live_key, live_entry]) + "\n")
+            os.replace(temp_path, self.filename)
+            self._journal_lines = len(self._entries)
+
+    def get(self, key):
+        """Return the recorded entry for a key, or None."""
+        with self._lock:
+            self._load()
+            return self._entries.get(key)
+
+    def begin(self, key, operation, trip_id):
+        """Record that an operation on a trip has started."""
+        with self._lock:
+            self._write(key, {"state": "started", "operation": operation, "trip_id": trip_id})
+
+    def complete(self, key, result):
+        """Record the final result for a key."""
+        with self._lock:
+            self._load()
+            entry = dict(self._entries.get(key, {}), state="done", result=result)
+            self._write(key, entry)
+
+
+booking_ledger = BookingLedger()
@@ -0,0 +1,225 @@
+"""Streaming bulk import and export of passengers, drivers and trips."""
+import csv
+import json
+import time
+import uuid
+from datetime import datetime
+from itertools import islice
+
+from .ids import id_allocator
+from .models import Driver, Passenger, Trip, User, Vehicle
+from .records import append_json_records, user_records
+from .storage import trip_store
+
+
+class BulkLoader:
+    """Streaming CSV/JSONL import and export of passengers, drivers and trips."""
+    USER_FILES = {"passengers": "passengers.json", "drivers": "drivers.json"}
+    USER_COLUMNS = ["id", "first_name", "last_name", "contact", "email", "password"]
+    # CSV columns, fixed so that records missing a field never narrow the header
+    CSV_COLUMNS = {
+        "passengers": USER_COLUMNS,
+        "drivers": USER_COLUMNS + [
+            "license_plate", "model", "color", "seats", "pending_trip_ids", "in_progress_trip_ids",
+            "completed_trip_ids", "canceled_trip_ids", "total_earnings", "state",
+        ],
+        "trips": [
+            "trip_id", "route", "distance", "base_fare", "stops", "driver_id", "passenger_groups",
+            "capacity", "available_seats", "start_time", "status", "final_fare",
+        ],
+    }
+
+    def __init__(self, chunk_size=1000):
+        self.chunk_size = chunk_size
+
+    # --- Reading ---
+
+    @staticmethod
+    def _read_rows(path):
+        """Yield one dict per CSV row or JSONL line without loading the whole file."""
+        with open(path, "r", newline="") as file:
+            if path.endswith(".csv"):
+                yield from csv.DictReader(file)
+            else:
+                for line in file:
+                    if line.strip():
+                        yield json.loads(line)
+
+    def _chunks(self, rows):
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+    # --- Record builders ---
+
+    # List fields that a CSV row carries as JSON text
+    LIST_FIELDS = ["pending_trip_ids", "in_progress_trip_ids", "completed_trip_ids", "canceled_trip_ids", "trip_ids"]
+    VEHICLE_COLUMNS = ["license_plate", "model", "color", "seats"]
+
+    @classmethod
+    def _build_user(cls, row, user_class):
+        """Normalize a CSV or JSONL user row into a stored record.
+
+        Fields the row carries (ID, email, trip lists, earnings, state) are kept
+        as they are; only missing ones are filled in, so an exported file
+        imports back unchanged and no email sequence number is spent on a row
+        that already has an email.
+        """
+        record = {key: value for key, value in row.items() if value not in (None, "")}
+        for field in cls.LIST_FIELDS:
+            if isinstance(record.get(field), str):
+                record[field] = json.loads(record[field])
+        if "total_earnings" in record:
+            record["total_earnings"] = float(record["total_earnings"])
+
+        if user_class is Driver:
+            columns = {key: record.pop(key) for key in cls.VEHICLE_COLUMNS if key in record}
+            vehicle_details = record.get("vehicle_details")
+            if isinstance(vehicle_details, str):
+                vehicle_details = json.loads(vehicle_details)
+            if not vehicle_details and columns.get("license_plate"):
+                vehicle_details = {key: columns.get(key) for key in ("license_plate", "model", "color")}
+            if vehicle_details:
+                vehicle_details["seats"] = int(vehicle_details.get("seats") or columns.get("seats") or 4)
+            record["vehicle_details"] = vehicle_details or Vehicle.generate_vehicle().get_vehicle_details()
+
+        record.setdefault("id", str(uuid.uuid4()))
+        if "email" not in record:
+            record["email"] = id_allocator.next_email(record["first_name"], record["last_name"])
+        record.setdefault("password", User._generate_password())
+        user = user_class.from_record(record)
+        return {**user.get_user_details(), **record}
+
+    @staticmethod
+    def _build_trip(row):
+        """Normalize a CSV or JSONL trip row into a stored trip record."""
+        passenger_groups = row.get("passenger_groups") or []
+        if isinstance(passenger_groups, str):
+            passenger_groups = json.loads(passenger_groups)
+        if not passenger_groups and row.get("passenger_id"):
+            passenger_groups = [{"passenger_id": row["passenger_id"], "group_size": int(row.get("group_size") or 1)}]
+
+        stops = row.get("stops") or None
+        if isinstance(stops, str):
+            stops = json.loads(stops)
+
+        distance = float(row["distance"])
+        seats_taken = sum(group["group_size"] for group in passenger_groups)
+        capacity = row.get("capacity")
+        if capacity in (None, ""):
+            # Older exports have no capacity: use the driver's vehicle
+            driver = user_records.by_id("drivers.json", row["driver_id"]) or {}
+            capacity = driver.get("vehicle_details", {}).get("seats", 4)
+        capacity = int(capacity)
+        available_seats = row.get("available_seats")
+        final_fare = row.get("final_fare")
+        trip = {
+            "trip_id": row.get("trip_id") or id_allocator.next_trip_id(),
+            "route": row["route"],
+            "distance": distance,
+            "base_fare": float(row.get("base_fare") or Trip.calculate_base_fare(distance)),
+            "driver_id": row["driver_id"],
+            "passenger_groups": passenger_groups,
+            "capacity": capacity,
+            "available_seats": int(available_seats) if available_seats not in (None, "") else capacity - seats_taken,
+            "start_time": row.get("start_time") or datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "status": row.get("status") or "pending",
+            "final_fare": float(final_fare) if final_fare not in (None, "") else None,
+        }
+        if stops:
+            trip["stops"] = stops
+        return trip
+
+    # --- Import ---
+
+    def import_file(self, path, kind):
+        """Import a CSV/JSONL file of the given kind; return (imported, skipped)."""
+        if kind not in ("passengers", "drivers", "trips"):
+            print(f"Error: Unknown record kind '{kind}'.")
+            return 0, 0
+
+        seen = set()  # Emails and IDs for users, trip IDs for trips
+        if kind in self.USER_FILES:
+            try:
+                with open(self.USER_FILES[kind], "r") as file:
+                    for record in json.load(file):
+                        seen.add(("email", record.get("email")))
+                        seen.add(("id", record.get("id")))
+            except (FileNotFoundError, json.JSONDecodeError):
+                seen = set()
+
+        imported = skipped = 0
+        started = time.monotonic()
+        for chunk in self._chunks(self._read_rows(path)):
+            batch = []
+            for row in chunk:
+                try:
+                    if kind == "trips":
+                        record = self._build_trip(row)
+                        keys = [record["trip_id"]]
+                    else:
+                        record = self._build_user(row, Passenger if kind == "passengers" else Driver)
+                        # A row with an ID but no email gets a fresh email, so match on the ID too
+                        keys = [("email", record["email"]), ("id", record["id"])]
+                except (KeyError, TypeError, ValueError) as e:
+                    print(f"Skipping invalid {kind} row: {e}")
+                    skipped += 1
+                    continue
+
+                if any(key in seen for key in keys):
+                    skipped += 1
+                    continue
+                seen.update(keys)
+                batch.append(record)
+
+            if kind == "trips":
+                trip_store.save_trips(batch)
+            else:
+                append_json_records(self.USER_FILES[kind], batch)
+            imported += len(batch)
+
+            elapsed = max(time.monotonic() - started, 1e-9)
+            print(f"{kind}: {imported} imported, {skipped} skipped ({imported / elapsed:.0f} records/s)")
+
+        return imported, skipped
+
+    # --- Export ---
+
+    def _iter_records(self, kind):
+        if kind == "trips":
+            yield from trip_store.get_active_trips()
+            yield from trip_store.get_finished_trips(include_closed=True)
+            return
+        try:
+            with open(self.USER_FILES[kind], "r") as file:
+                yield from json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+
+    def export_file(self, path, kind):
+        """Export all records of a kind to CSV or JSONL; return the record count."""
+        count = 0
+        dropped = set()  # Fields with no CSV column
+        with open(path, "w", newline="") as file:
+            writer = None
+            if path.endswith(".csv"):
+                writer = csv.DictWriter(file, fieldnames=self.CSV_COLUMNS[kind], extrasaction="ignore")
+                writer.writeheader()
+            for record in self._iter_records(kind):
+                if path.endswith(".csv"):
+                    row = dict(record)
+                    if kind == "drivers":
+                        row.update(row.pop("vehicle_details", {}))
+                    row = {key: json.dumps(value) if isinstance(value, (list, dict)) else value
+                           for key, value in row.items()}
+                    dropped.update(set(row) - set(writer.fieldnames))
+                    writer.writerow(row)
+                else:
+                    file.write(json.dumps(record) + "\n")
+                count += 1
+        print(f"{kind}: {count} exported to {path}")
+        if dropped:
+            print(f"Warning: CSV has no column for {', '.join(sorted(dropped))}; use JSONL to keep them.")
+        return count
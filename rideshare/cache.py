@@ -0,0 +1,70 @@
+"""Read-through cache for per-user views."""
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Read-through cache keyed by (user id, view) with a TTL and LRU eviction.
+
+    Loaders run outside the lock, so a value whose load overlapped an
+    invalidation may predate the write that caused it; such values are
+    returned to their caller but not cached.
+    """
+    def __init__(self, maxsize=1024, ttl=60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl  # Seconds an entry stays fresh
+        self._entries = OrderedDict()  # (user_id, view) -> (expires_at, value)
+        self._keys_by_user = {}  # user_id -> set of cached keys
+        self._lock = threading.Lock()
+        self._invalidations = 0  # Bumped by invalidate() and clear()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_load(self, user_id, view, loader):
+        """Return the cached value, calling loader() on a miss or after expiry."""
+        key = (user_id, view)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            invalidations = self._invalidations
+
+        value = loader()
+        with self._lock:
+            if invalidations != self._invalidations:
+                return value  # Data changed while loading
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            self._keys_by_user.setdefault(user_id, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                evicted, _ = self._entries.popitem(last=False)
+                self._forget(evicted)
+        return value
+
+    def invalidate(self, *user_ids):
+        """Drop every cached view for the given users."""
+        with self._lock:
+            self._invalidations += 1
+            for user_id in user_ids:
+                for key in self._keys_by_user.pop(user_id, ()):
+                    self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._invalidations += 1
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def _forget(self, key):
+        keys = self._keys_by_user.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[key[0]]
+
+
+profile_cache = TTLCache()
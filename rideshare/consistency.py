@@ -0,0 +1,280 @@
+"""Consistency checks and repair for the driver, passenger and trip files."""
+import json
+import os
+import time
+
+from .availability import driver_availability
+from .cache import profile_cache
+from .records import file_lock, user_records
+from .storage import trip_store
+
+
+def iter_json_list(filename, chunk_size=1 << 16):
+    """Yield the records of a JSON list file one at a time, reading it in chunks."""
+    decoder = json.JSONDecoder()
+    try:
+        file = open(filename, "r")
+    except FileNotFoundError:
+        return
+    with file:
+        buffer, position, eof = "", 0, False
+        while True:
+            # Skip the separators between records
+            while position < len(buffer) and buffer[position] in " \t\r\n,[":
+                position += 1
+            if position < len(buffer) and buffer[position] == "]":
+                return
+            try:
+                if position >= len(buffer):
+                    raise ValueError("need more data")
+                record, position = decoder.raw_decode(buffer, position)
+            except ValueError:
+                if eof:
+                    if buffer[position:].strip():
+                        raise ValueError(f"{filename} does not hold a JSON list")
+                    return
+                chunk = file.read(chunk_size)
+                eof = not chunk
+                buffer, position = buffer[position:] + chunk, 0  # Drop what was already decoded
+                continue
+            yield record
+
+
+def write_json_list(filename, records):
+    """Write records as an indented JSON list, one record at a time, replacing the file atomically."""
+    temp_path = filename + ".tmp"
+    with open(temp_path, "w") as file:
+        separator = "[\n"
+        for record in records:
+            file.write(separator + "\n".join("    " + line for line in json.dumps(record, indent=4).split("\n")))
+            separator = ",\n"
+        file.write("[]" if separator == "[\n" else "\n]")
+    os.replace(temp_path, filename)
+
+
+class ConsistencyChecker:
+    """Cross-checks drivers.json, passengers.json and the trip shards in one pass.
+
+    Users are indexed first, by ID only. Then every trip shard is streamed once.
+    Each trip is checked against the indexes and folded into its driver's
+    running totals: a digest of (list, trip ID) pairs and the completed-trip
+    earnings. These are compared with each stored driver record at the end.
+    check() keeps the user indexes, the running totals and a small stub per
+    active trip, so its memory grows with the number of users and active trips,
+    not with the trip history. repair() rebuilds every driver's trip lists and
+    earnings from the trip records and fixes the trip records that can be
+    derived; it holds the rebuilt lists of trip IDs, which grow with the
+    history like the lists in drivers.json itself.
+    """
+    LISTS = {
+        "pending": "pending_trip_ids",
+        "in-progress": "in_progress_trip_ids",
+        "completed": "completed_trip_ids",
+        "canceled": "canceled_trip_ids",
+    }
+    SAMPLE_SIZE = 10  # Examples kept per kind of issue
+    DIGEST_MASK = (1 << 64) - 1
+
+    def __init__(self, store=trip_store, drivers_file="drivers.json", passengers_file="passengers.json"):
+        self.store = store
+        self.drivers_file = drivers_file
+        self.passengers_file = passengers_file
+
+    def _issue(self, kind, detail):
+        self.issues[kind] = self.issues.get(kind, 0) + 1
+        samples = self.samples.setdefault(kind, [])
+        if len(samples) < self.SAMPLE_SIZE:
+            samples.append(detail)
+
+    def _digest(self, name, trip_id):
+        return hash((name, trip_id)) & self.DIGEST_MASK
+
+    @staticmethod
+    def trip_fare(trip):
+        """Final fare of a trip: the stored one, otherwise the sum of its group fares."""
+        if trip.get("final_fare") is not None:
+            return trip["final_fare"]
+        return sum(
+            group.get("fare", trip.get("base_fare", 0) * group["group_size"])
+            for group in trip.get("passenger_groups", [])
+        )
+
+    # --- Pass 1: users ---
+
+    def _records(self, filename):
+        try:
+            yield from iter_json_list(filename)
+        except ValueError:
+            self._issue("unreadable_file", filename)
+
+    def _index_drivers(self):
+        """Return driver_id -> [stored list count, stored digest, stored earnings]."""
+        drivers = {}
+        for record in self._records(self.drivers_file):
+            driver_id = record.get("id")
+            if driver_id in drivers:
+                self._issue("duplicate_driver", driver_id)
+                continue
+            count, digest, listed = 0, 0, set()
+            for name in self.LISTS.values():
+                for trip_id in record.get(name, []):
+                    if trip_id in listed:
+                        self._issue("trip_in_several_lists", f"driver {driver_id}: {trip_id}")
+                    listed.add(trip_id)
+                    count += 1
+                    digest = (digest + self._digest(name, trip_id)) & self.DIGEST_MASK
+            drivers[driver_id] = [count, digest, record.get("total_earnings", 0)]
+        return drivers
+
+    def _index_passengers(self):
+        passengers = set()
+        for record in self._records(self.passengers_file):
+            if record.get("id") in passengers:
+                self._issue("duplicate_passenger", record.get("id"))
+            passengers.add(record.get("id"))
+        return passengers
+
+    # --- Pass 2: trips ---
+
+    def _check_trip(self, trip, drivers, passengers):
+        """Check one trip against the user indexes; return the repaired record or None."""
+        trip_id = trip["trip_id"]
+        fixed = None
+        if trip.get("driver_id") not in drivers:
+            self._issue("unknown_driver", f"trip {trip_id}: driver {trip.get('driver_id')}")
+        for group in trip.get("passenger_groups", []):
+            if group["passenger_id"] not in passengers:
+                self._issue("unknown_passenger", f"trip {trip_id}: passenger {group['passenger_id']}")
+        if trip.get("status") not in self.LISTS:
+            self._issue("bad_status", f"trip {trip_id}: {trip.get('status')!r}")
+
+        taken = sum(group["group_size"] for group in trip.get("passenger_groups", []))
+        capacity = trip.get("capacity")
+        if capacity is not None and trip.get("available_seats") != capacity - taken:
+            self._issue("seat_mismatch", f"trip {trip_id}: {trip.get('available_seats')} free, {taken}/{capacity} taken")
+            fixed = dict(trip, available_seats=capacity - taken)
+        if trip.get("status") == "completed" and trip.get("final_fare") is None:
+            self._issue("missing_final_fare", f"trip {trip_id}")
+            fixed = dict(fixed or trip, final_fare=self.trip_fare(trip))
+        return fixed
+
+    def _fold(self, derived, lists, trip, sign=1):
+        """Add (or with sign=-1, take back) a trip's contribution to its driver's totals."""
+        name = self.LISTS.get(trip.get("status"))
+        if name is None:
+            return
+        totals = derived.setdefault(trip["driver_id"], [0, 0, 0.0])
+        totals[0] += sign
+        totals[1] = (totals[1] + sign * self._digest(name, trip["trip_id"])) & self.DIGEST_MASK
+        if trip["status"] == "completed":
+            totals[2] += sign * self.trip_fare(trip)
+        if lists is not None:
+            trip_ids = lists.setdefault(trip["driver_id"], {}).setdefault(name, [])
+            if sign > 0:
+                trip_ids.append(trip["trip_id"])
+            else:
+                trip_ids.remove(trip["trip_id"])
+
+    def _scan(self, collect_lists=False):
+        """Run both passes; return (driver totals, driver lists or None, trip fixes)."""
+        self.issues, self.samples = {}, {}
+        self.counts = {"drivers": 0, "passengers": 0, "trips": 0}
+        drivers = self._index_drivers()
+        passengers = self._index_passengers()
+        self.counts["drivers"], self.counts["passengers"] = len(drivers), len(passengers)
+
+        derived = {}  # driver_id -> [trip count, digest, earnings] from the trips
+        lists = {} if collect_lists else None
+        active = {}  # trip_id -> stub of what an active trip added, to catch copies left behind after archiving
+        fixes = {}  # trip_id -> repaired record
+        for path, trips in self.store.iter_trip_batches():
+            archived = os.sep + "archive" + os.sep in path
+            seen = set()
+            for trip in trips:
+                trip_id = trip.get("trip_id")
+                if not trip_id or not trip.get("driver_id"):
+                    self._issue("malformed_trip", f"{trip_id or 'no trip_id'} in {path}")
+                    continue
+                if trip_id in seen:
+                    self._issue("duplicate_trip", f"{trip_id} twice in {path}")
+                    continue
+                seen.add(trip_id)
+                if archived and trip_id in active:
+                    # The archived copy is the newer one; forget the stale active copy
+                    self._issue("duplicate_trip", f"{trip_id} both active and archived")
+                    self._fold(derived, lists, active.pop(trip_id), sign=-1)
+                    self.counts["trips"] -= 1
+                    fixes.setdefault(trip_id, trip)
+                self.counts["trips"] += 1
+                fixed = self._check_trip(trip, drivers, passengers)
+                if fixed is not None:
+                    fixes[trip_id] = fixed
+                self._fold(derived, lists, fixed or trip)
+                if not archived:
+                    # Only what _fold reads, so a stale copy can be taken back without keeping the record
+                    active[trip_id] = {
+                        "trip_id": trip_id, "driver_id": trip["driver_id"], "status": trip.get("status"),
+                        "final_fare": self.trip_fare(fixed or trip),
+                    }
+
+        for driver_id, (count, digest, earnings) in drivers.items():
+            trip_count, trip_digest, trip_earnings = derived.get(driver_id, (0, 0, 0.0))
+            if (count, digest) != (trip_count, trip_digest):
+                self._issue("driver_lists", f"driver {driver_id}: {count} listed, {trip_count} from trips")
+            if abs(earnings - trip_earnings) > 0.005:
+                self._issue("driver_earnings", f"driver {driver_id}: {earnings} stored, {trip_earnings:.2f} from trips")
+        return derived, lists, list(fixes.values())
+
+    # --- Entry points ---
+
+    def check(self):
+        """Return a report: record counts, issue counts by kind, a few examples of each and the time taken."""
+        started = time.perf_counter()
+        self._scan()
+        return self._report(started)
+
+    def repair(self):
+        """Rebuild driver trip lists and earnings from the trips and save repaired trips; return the check report."""
+        started = time.perf_counter()
+        derived, lists, fixes = self._scan(collect_lists=True)
+        if "unreadable_file" in self.issues:
+            print("Error: A user file could not be read; nothing was repaired.")
+            report = self._report(started)
+            report["repaired"] = {"drivers": 0, "trips": 0}
+            return report
+        if fixes:
+            self.store.save_trips(fixes)
+
+        repaired = []
+
+        def rebuilt_drivers():
+            for record in iter_json_list(self.drivers_file):
+                trip_lists = lists.get(record.get("id"), {})
+                for name in self.LISTS.values():
+                    record[name] = trip_lists.get(name, [])
+                record["total_earnings"] = round(derived.get(record.get("id"), (0, 0, 0.0))[2], 2)
+                repaired.append(record)
+                yield record
+
+        if os.path.exists(self.drivers_file):
+            with file_lock(self.drivers_file):  # Driver saves wait until the rebuilt file is in place
+                write_json_list(self.drivers_file, rebuilt_drivers())
+        user_records.invalidate(self.drivers_file)
+        for record in repaired:
+            profile_cache.invalidate(record["id"])
+            driver_availability.register(record)
+
+        report = self._report(started)
+        report["repaired"] = {"drivers": len(repaired), "trips": len(fixes)}
+        return report
+
+    def _report(self, started):
+        return {
+            **self.counts,
+            "issues": dict(sorted(self.issues.items())),
+            "samples": self.samples,
+            "seconds": time.perf_counter() - started,
+        }
+
+
+consistency_checker = ConsistencyChecker()
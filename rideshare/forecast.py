@@ -0,0 +1,83 @@
+"""Demand forecasting over completed trips (needs NumPy when used)."""
+from datetime import datetime, timedelta
+
+from .storage import trip_store
+
+
+class DemandForecaster:
+    """Next-hour trip demand per zone, forecast from completed trip history.
+
+    Completed trips are bucketed into an hourly (zone x hour) count matrix. Two
+    lightweight models are fitted with NumPy and blended: a seasonal average
+    for each hour of the week, and an exponentially smoothed recent level.
+    NumPy is imported only when a forecast is requested.
+    """
+    HOURS_PER_WEEK = 168
+
+    def __init__(self, history_weeks=8, alpha=0.3, seasonal_weight=0.6):
+        self.history_weeks = history_weeks
+        self.alpha = alpha  # Smoothing factor for the recent level
+        self.seasonal_weight = seasonal_weight  # Share of the seasonal model in the blend
+        self.zones = []
+        self.counts = None  # zones x hours matrix of completed trips
+
+    @staticmethod
+    def zone_of(route):
+        """Normalize a route into the zone it is counted under."""
+        return " ".join(route.lower().split()) or "unknown"
+
+    def _history(self, now):
+        """Return completed trips that started inside the history window."""
+        since = now - timedelta(weeks=self.history_weeks)
+        cutoff = since.strftime("%Y-%m-%d %H:%M:%S")
+        trips = trip_store.get_finished_trips(include_closed=True, since=since)  # Older months are never read
+        return [
+            trip for trip in trips
+            if trip.get("status") == "completed" and cutoff <= trip.get("start_time", "") <= now.strftime("%Y-%m-%d %H:%M:%S")
+        ]
+
+    def fit(self, now=None):
+        """Build the hourly time series and return the next-hour forecast per zone."""
+        import numpy as np
+
+        now = now or datetime.now()
+        trips = self._history(now)
+        if not trips:
+            self.zones, self.counts = [], None
+            return {}
+
+        self.zones = sorted({self.zone_of(trip["route"]) for trip in trips})
+        zone_index = {zone: i for i, zone in enumerate(self.zones)}
+        zone_ids = np.array([zone_index[self.zone_of(trip["route"])] for trip in trips])
+        hours = np.array([trip["start_time"].replace(" ", "T") for trip in trips], dtype="datetime64[h]")
+
+        first_hour = np.datetime64(now - timedelta(weeks=self.history_weeks), "h")
+        current_hour = np.datetime64(now, "h")
+        hour_count = int((current_hour - first_hour) / np.timedelta64(1, "h")) + 1
+        self.counts = np.zeros((len(self.zones), hour_count))
+        np.add.at(self.counts, (zone_ids, (hours - first_hour).astype(int)), 1)
+
+        # Seasonal model: mean demand for each hour of the week (1970-01-01 was a Thursday)
+        hour_numbers = (first_hour + np.arange(hour_count)).astype(int)
+        hour_of_week = (hour_numbers + 72) % self.HOURS_PER_WEEK
+        seasonal_sum = np.zeros((len(self.zones), self.HOURS_PER_WEEK))
+        np.add.at(seasonal_sum, (slice(None), hour_of_week), self.counts)
+        seasonal = seasonal_sum / np.maximum(np.bincount(hour_of_week, minlength=self.HOURS_PER_WEEK), 1)
+
+        # Exponential smoothing as one weighted sum over the series: weight alpha*(1-alpha)^age
+        ages = np.arange(hour_count)[::-1]
+        weights = self.alpha * (1 - self.alpha) ** ages
+        level = self.counts @ weights
+
+        next_hour_of_week = (int(current_hour.astype(int)) + 1 + 72) % self.HOURS_PER_WEEK
+        forecast = self.seasonal_weight * seasonal[:, next_hour_of_week] + (1 - self.seasonal_weight) * level
+        return dict(zip(self.zones, forecast.round(2).tolist()))
+
+    def hot_zones(self, limit=5, now=None):
+        """Return the zones with the highest expected demand next hour, busiest first."""
+        forecast = self.fit(now)
+        ranked = sorted(forecast.items(), key=lambda item: item[1], reverse=True)
+        return [(zone, demand) for zone, demand in ranked[:limit] if demand > 0]
+
+
+demand_forecaster = DemandForecaster()
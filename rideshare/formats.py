@@ -0,0 +1,187 @@
+"""Storage codecs for trip shards."""
+import json
+import os
+import struct
+import time
+
+
+class JsonCodec:
+    """JSON record codec; indent=4 reproduces the original pretty-printed files."""
+    extension = ".json"
+
+    def __init__(self, indent=None):
+        self.indent = indent
+        self.name = "json-pretty" if indent else "json"
+        self._separators = None if indent else (",", ":")
+
+    def encode(self, records):
+        return json.dumps(records, indent=self.indent, separators=self._separators).encode("utf-8")
+
+    def decode(self, data):
+        return json.loads(data)
+
+
+class BinaryCodec:
+    """Compact binary record codec: msgpack when installed, otherwise a struct-packed format.
+
+    The struct format writes each dict key once into a key table and refers to
+    it by index, so repeated field names cost two bytes per record.
+    """
+    extension = ".bin"
+    name = "binary"
+    MAGIC_STRUCT = b"RSB1"
+    MAGIC_MSGPACK = b"RSM1"
+    _INT = struct.Struct("<q")
+    _FLOAT = struct.Struct("<d")
+    _LENGTH = struct.Struct("<I")
+    _KEY = struct.Struct("<H")
+
+    def __init__(self, use_msgpack=True):
+        self._msgpack = None
+        if use_msgpack:
+            try:
+                import msgpack
+                self._msgpack = msgpack
+            except ImportError:
+                pass  # Fall back to the stdlib struct format
+
+    def encode(self, records):
+        if self._msgpack is not None:
+            return self.MAGIC_MSGPACK + self._msgpack.packb(records, use_bin_type=True)
+        keys = {}
+        body = bytearray()
+        self._pack(records, body, keys)
+        header = bytearray(self.MAGIC_STRUCT)
+        header += self._LENGTH.pack(len(keys))
+        for key in keys:
+            raw = key.encode("utf-8")
+            header += self._KEY.pack(len(raw)) + raw
+        return bytes(header + body)
+
+    def _pack(self, value, out, keys):
+        if value is None:
+            out += b"N"
+        elif value is True:
+            out += b"T"
+        elif value is False:
+            out += b"F"
+        elif isinstance(value, int):
+            out += b"i" + self._INT.pack(value)
+        elif isinstance(value, float):
+            out += b"d" + self._FLOAT.pack(value)
+        elif isinstance(value, str):
+            raw = value.encode("utf-8")
+            out += b"s" + self._LENGTH.pack(len(raw)) + raw
+        elif isinstance(value, (list, tuple)):
+            out += b"l" + self._LENGTH.pack(len(value))
+            for item in value:
+                self._pack(item, out, keys)
+        elif isinstance(value, dict):
+            out += b"m" + self._LENGTH.pack(len(value))
+            for key, item in value.items():
+                out += self._KEY.pack(keys.setdefault(key, len(keys)))
+                self._pack(item, out, keys)
+        else:
+            raise TypeError(f"Cannot encode {type(value).__name__} values")
+
+    def decode(self, data):
+        magic = bytes(data[:4])
+        if magic == self.MAGIC_MSGPACK:
+            if self._msgpack is None:
+                raise ValueError("msgpack-encoded data needs the msgpack package")
+            return self._msgpack.unpackb(data[4:], raw=False)
+        if magic != self.MAGIC_STRUCT:
+            raise ValueError("Not a binary record file")
+
+        data = memoryview(data)
+        (key_count,) = self._LENGTH.unpack_from(data, 4)
+        position = 8
+        keys = []
+        for _ in range(key_count):
+            (length,) = self._KEY.unpack_from(data, position)
+            position += 2
+            keys.append(str(data[position:position + length], "utf-8"))
+            position += length
+        value, _ = self._unpack(data, position, keys)
+        return value
+
+    def _unpack(self, data, position, keys):
+        tag = data[position]
+        position += 1
+        if tag == 0x73:  # "s"
+            (length,) = self._LENGTH.unpack_from(data, position)
+            position += 4
+            return str(data[position:position + length], "utf-8"), position + length
+        if tag == 0x64:  # "d"
+            return self._FLOAT.unpack_from(data, position)[0], position + 8
+        if tag == 0x69:  # "i"
+            return self._INT.unpack_from(data, position)[0], position + 8
+        if tag == 0x6D:  # "m"
+            (count,) = self._LENGTH.unpack_from(data, position)
+            position += 4
+            result = {}
+            for _ in range(count):
+                (key,) = self._KEY.unpack_from(data, position)
+                result[keys[key]], position = self._unpack(data, position + 2, keys)
+            return result, position
+        if tag == 0x6C:  # "l"
+            (count,) = self._LENGTH.unpack_from(data, position)
+            position += 4
+            result = []
+            for _ in range(count):
+                item, position = self._unpack(data, position, keys)
+                result.append(item)
+            return result, position
+        if tag == 0x4E:  # "N"
+            return None, position
+        if tag == 0x54:  # "T"
+            return True, position
+        if tag == 0x46:  # "F"
+            return False, position
+        raise ValueError(f"Unknown value tag {tag!r}")
+
+
+STORAGE_CODECS = {
+    "json": JsonCodec(),
+    "json-pretty": JsonCodec(indent=4),
+    "binary": BinaryCodec(),
+}
+
+
+def get_codec(name=None):
+    """Return the storage codec by name, defaulting to the RIDESHARE_CODEC setting."""
+    name = name or os.environ.get("RIDESHARE_CODEC", "json")
+    if name not in STORAGE_CODECS:
+        print(f"Error: Unknown storage codec '{name}'. Using compact JSON.")
+        name = "json"
+    return STORAGE_CODECS[name]
+
+
+def decode_records(data):
+    """Decode records written by any storage codec, detected from the data itself."""
+    if data[:4] in (BinaryCodec.MAGIC_STRUCT, BinaryCodec.MAGIC_MSGPACK):
+        return STORAGE_CODECS["binary"].decode(data)
+    return json.loads(data)
+
+
+def benchmark_codecs(records, rounds=5):
+    """Measure bytes and encode/decode time per record for every storage codec."""
+    results = []
+    for name, codec in STORAGE_CODECS.items():
+        encoded = codec.encode(records)
+        started = time.perf_counter()
+        for _ in range(rounds):
+            codec.encode(records)
+        encode_time = (time.perf_counter() - started) / rounds
+        started = time.perf_counter()
+        for _ in range(rounds):
+            codec.decode(encoded)
+        decode_time = (time.perf_counter() - started) / rounds
+        count = max(len(records), 1)
+        results.append({
+            "codec": name,
+            "bytes_per_record": len(encoded) / count,
+            "encode_us_per_record": encode_time / count * 1e6,
+            "decode_us_per_record": decode_time / count * 1e6,
+        })
+    return results
@@ -0,0 +1,120 @@
+"""Unique emails, license plates and sortable trip IDs."""
+import json
+import os
+import threading
+import time
+
+from .records import file_lock
+
+
+class IdAllocator:
+    """Collision-free generator for emails, license plates and sortable trip IDs.
+
+    Email and plate numbers come from persisted sequences reserved in blocks,
+    so a signup never scans a user file for duplicates. Reservations hold a
+    lock file, so processes sharing the data (the app and a bulk import) never
+    get the same block. Trip IDs are Snowflake-style (milliseconds, node,
+    per-millisecond sequence) encoded as fixed-width base32, so they sort by
+    creation time; each process reserves its node number from the same
+    sequence file, so concurrent processes do not share one.
+    """
+    ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"  # Crockford base32, in sort order
+    EPOCH_MS = 1704067200000  # 2024-01-01 00:00:00 UTC
+    NODE_BITS = 10
+    SEQUENCE_BITS = 12
+    ID_LENGTH = 13  # 63 bits of base32
+
+    def __init__(self, filename="sequences.json", block_size=100, node_id=None):
+        self.filename = filename
+        self.block_size = block_size  # Values reserved per write of the sequence file
+        if node_id is None and os.environ.get("RIDESHARE_NODE_ID"):
+            node_id = int(os.environ["RIDESHARE_NODE_ID"])
+        self._node_id = None if node_id is None else node_id % (1 << self.NODE_BITS)
+        self._blocks = {}  # sequence name -> [next value, end of reserved block]
+        self._last_ms = 0
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    # --- Sequences ---
+
+    def next_value(self, name):
+        """Return the next value of a named, persisted sequence."""
+        with self._lock:
+            block = self._blocks.get(name)
+            if block is None or block[0] >= block[1]:
+                block = self._blocks[name] = self._reserve_block(name)
+            value = block[0]
+            block[0] += 1
+            return value
+
+    @property
+    def node_id(self):
+        """This process's node number, reserved from the sequence file on first use."""
+        if self._node_id is None:
+            self._node_id = self._reserve_block("node", size=1)[0] % (1 << self.NODE_BITS)
+        return self._node_id
+
+    def _reserve_block(self, name, size=None):
+        size = size or self.block_size
+        with file_lock(self.filename):
+            try:
+                with open(self.filename, "r") as file:
+                    sequences = json.load(file)
+            except (FileNotFoundError, json.JSONDecodeError):
+                sequences = {}
+            start = sequences.get(name, 1)
+            sequences[name] = start + size
+            temp_path = self.filename + ".tmp"
+            with open(temp_path, "w") as file:
+                json.dump(sequences, file, indent=4)
+            os.replace(temp_path, self.filename)
+        return [start, start + size]
+
+    def next_email(self, first_name, last_name):
+        """Return a unique email; the dot before the number keeps it apart from legacy emails."""
+        cleaned_first = ''.join(e for e in first_name.lower() if e.isalnum())
+        cleaned_last = ''.join(e for e in last_name.lower() if e.isalnum())
+        return f"{cleaned_first}.{cleaned_last}.{self.next_value('email')}@rideshare.com"
+
+    def next_license_plate(self):
+        """Return a unique plate of three or more letters and four digits (legacy plates use one letter)."""
+        value = self.next_value("plate")
+        letters, digits = divmod(value, 10000)
+        prefix = ""
+        while letters or len(prefix) < 3:
+            letters, index = divmod(letters, 26)
+            prefix = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"[index] + prefix
+        return f"{prefix}{digits:04d}"
+
+    # --- Sortable trip IDs ---
+
+    def next_trip_id(self):
+        """Return a unique trip ID that sorts by creation time."""
+        node_id = self.node_id
+        with self._lock:
+            now_ms = max(int(time.time() * 1000), self._last_ms)  # Never step back with the clock
+            if now_ms == self._last_ms:
+                self._sequence = (self._sequence + 1) % (1 << self.SEQUENCE_BITS)
+                if self._sequence == 0:
+                    while now_ms <= self._last_ms:  # Sequence exhausted: wait for the next millisecond
+                        now_ms = int(time.time() * 1000)
+            else:
+                self._sequence = 0
+            self._last_ms = now_ms
+            value = (
+                ((now_ms - self.EPOCH_MS) << (self.NODE_BITS + self.SEQUENCE_BITS))
+                | (node_id << self.SEQUENCE_BITS)
+                | self._sequence
+            )
+        return self._encode(value)
+
+    @classmethod
+    def _encode(cls, value):
+        chars = []
+        for _ in range(cls.ID_LENGTH):
+            value, index = divmod(value, 32)
+            chars.append(cls.ALPHABET[index])
+        return "".join(reversed(chars))
+
+
+id_allocator = IdAllocator()
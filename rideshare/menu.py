@@ -0,0 +1,489 @@
+"""Interactive menus for passengers and drivers."""
+import random
+import uuid
+from datetime import datetime
+
+from .admission import AdmissionController, admission_control, request_source
+from .availability import DriverAvailability, driver_availability
+from .models import Driver, Passenger, Trip, Vehicle, fetch_driver, find_available_driver
+from .query import trip_index
+from .records import user_records
+from .scheduler import trip_scheduler
+from .storage import TripStore
+
+
+class Menu:
+    source = request_source()  # Rate-limit key for this session's connection
+
+    @classmethod
+    def general_menu(cls):
+        """General menu for login and signup."""
+        while True:
+            cls.display_motivation()  # Show motivational quote before the menu appears
+            print("\n--- General Menu ---")
+            print("1. Login")
+            print("2. Sign Up")
+            print("3. Exit")
+            choice = input("Enter your choice: ")
+
+            if choice == "1":
+                email = input("Enter your email: ")
+                password = input("Enter your password: ")
+                user_type, user = cls.authenticate_user(email, password)
+
+                if user_type == "passenger":
+                    print("\nLogin successful! Redirecting to Passenger Menu...")
+                    cls.passenger_menu(user)
+                elif user_type == "driver":
+                    print("\nLogin successful! Redirecting to Driver Menu...")
+                    cls.driver_menu(user)
+                else:
+                    print("\nInvalid email or password. Please try again.")
+
+            elif choice == "2":
+                cls.sign_up_menu()
+
+            elif choice == "3":
+                print("Exiting...")
+                break
+
+            else:
+                print("Invalid choice. Please try again.")
+
+    @staticmethod
+    def sign_up_menu():
+        """Sign-Up menu for registering as Passenger or Driver."""
+        print("\n--- Sign Up Menu ---")
+        print("1. Sign Up as Passenger")
+        print("2. Sign Up as Driver")
+        choice = input("Enter your choice: ")
+
+        if choice == "1":
+            first_name = input("Enter your first name: ")
+            last_name = input("Enter your last name: ")
+            contact = input("Enter your contact: ")
+            passenger = Passenger(first_name, last_name, contact)
+            passenger.save_to_file("passengers.json")
+            print(f"\nPassenger created successfully!")
+            print(f"Email: {passenger._email}")
+            print(f"Password: {passenger._password}")
+
+        elif choice == "2":
+            first_name = input("Enter your first name: ")
+            last_name = input("Enter your last name: ")
+            contact = input("Enter your contact: ")
+
+            # Auto-generate a vehicle
+            vehicle = Vehicle.generate_vehicle()
+            print("\nAuto-Generated Vehicle Details:")
+            print(f"License Plate: {vehicle.license_plate}")
+            print(f"Model: {vehicle.model}")
+            print(f"Color: {vehicle.color}")
+
+            driver = Driver(first_name, last_name, contact, vehicle)
+            driver.save_to_file("drivers.json")
+            print(f"\nDriver created successfully!")
+            print(f"Email: {driver._email}")
+            print(f"Password: {driver._password}")
+
+        else:
+            print("Invalid choice. Returning to General Menu.")
+
+    @staticmethod
+    def authenticate_user(email, password, source=None):
+        """Authenticate user credentials and determine user type, subject to admission control."""
+        with admission_control.admit("login", user=email, source=source or Menu.source) as rejected:
+            if rejected:
+                print(AdmissionController.REJECTION_MESSAGES[rejected])
+                return None, None
+            return Menu._check_credentials(email, password)
+
+    @staticmethod
+    def _check_credentials(email, password):
+        """Return (user type, user) for matching credentials, or (None, None)."""
+        # Look up passengers
+        for passenger_data in user_records.by_email("passengers.json", email):
+            if passenger_data["password"] == password:
+                return "passenger", Passenger.from_record(passenger_data)
+
+        # Look up drivers
+        for driver_data in user_records.by_email("drivers.json", email):
+            if driver_data["password"] == password:
+                # Ensure vehicle details exist
+                vehicle_details = driver_data.get("vehicle_details", {})
+                if not vehicle_details:
+                    print("Error: Driver data is incomplete or corrupted.")
+                    return None, None
+
+                # Reconstruct the Driver with its stored trip lists and earnings
+                driver = Driver.from_record(driver_data)
+
+                # Synchronize pending trips for accuracy
+                driver._sync_pending_trips()
+
+                # Automatically save the driver state back to file on login
+                driver.save_to_file("drivers.json")
+
+                return "driver", driver
+
+        return None, None
+
+
+    @classmethod
+    def motivation_quote_1(cls):
+        print("\n🌟 Motivation of the Day 🌟\n"
+              "“The road to success is always under construction. Keep moving forward!” 🚀\n")
+
+    @classmethod
+    def motivation_quote_2(cls):
+        print("\n🌟 Motivation of the Day 🌟\n"
+              "“Don’t watch the clock; do what it does. Keep going.” ⏳\n")
+
+    @classmethod
+    def motivation_quote_3(cls):
+        print("\n🌟 Motivation of the Day 🌟\n"
+              "“Small steps every day add up to big success.” 🏃‍♂️💡\n")
+
+    @classmethod
+    def motivation_quote_4(cls):
+        print("\n🌟 Motivation of the Day 🌟\n"
+              "“Believe in yourself and all that you are. You are stronger than you think!” 💪✨\n")
+
+    @classmethod
+    def motivation_quote_5(cls):
+        print("\n🌟 Motivation of the Day 🌟\n"
+              "“Opportunities don’t happen. You create them.” 🌟💼\n")
+
+    @classmethod
+    def motivation_quote_6(cls):
+        print("\n🌟 Motivation of the Day 🌟\n"
+              "“Success doesn’t come to you. You go to it!” 🌠🛤️\n")
+
+    @classmethod
+    def display_motivation(cls):
+        """Display a random motivation of the day."""
+        quotes = [
+            cls.motivation_quote_1,
+            cls.motivation_quote_2,
+            cls.motivation_quote_3,
+            cls.motivation_quote_4,
+            cls.motivation_quote_5,
+            cls.motivation_quote_6,
+        ]
+        random.choice(quotes)()
+    
+    @staticmethod
+    def offer_shared_ride(route, distance, group_size, candidates=50):
+        """Offer a seat on the pending trip leaving around now that takes the group for the smallest detour.
+
+        Returns (Trip, RoutePlanner quote) if the passenger accepts, otherwise (None, None).
+        """
+        from .routing import route_planner
+
+        pending_trips = route_planner.candidate_trips(datetime.now(), candidates)
+        record, stop = route_planner.best_trip(pending_trips, route, distance, group_size)
+        if record is None or stop["fare"] >= stop["solo_fare"]:
+            return None, None
+        driver = fetch_driver(record["driver_id"])
+        if driver is None:
+            return None, None
+
+        print(
+            f"Shared ride available with {driver._first_name} {driver._last_name}: "
+            f"{len(record.get('passenger_groups', []))} group(s) aboard, adds {stop['added_km']:.1f} km. "
+            f"Fare: {stop['fare']:.2f} PHP instead of {stop['solo_fare']:.2f} PHP."
+        )
+        if input("Share this ride? (y/n): ").strip().lower() != "y":
+            return None, None
+        return Trip.from_record(record, driver), stop
+
+    @staticmethod
+    def passenger_menu(passenger):
+        """Menu for passenger-specific operations."""
+        while True:
+            print("\n--- Passenger Menu ---")
+            print("1. Book a Trip")
+            print("2. Cancel a Trip")
+            print("3. View Trip History")
+            print("4. View Profile")
+            print("5. Schedule a Trip")
+            print("6. View Scheduled Trips")
+            print("7. Logout")
+            choice = input("Enter your choice: ")
+
+            if choice == "1":  # Book a Trip
+                route = input("Enter destination: ")
+                distance = float(input("Enter distance (in km): "))
+
+                # Prompt for group size
+                group_size = int(input("How many passengers (1-4)? "))
+                if group_size < 1 or group_size > 4:
+                    print("Invalid group size. Please enter a number between 1 and 4.")
+                    continue
+
+                pooled_trip, stop = Menu.offer_shared_ride(route, distance, group_size)
+                driver = None
+                if pooled_trip is None:
+                    driver = find_available_driver()
+                    if not driver:
+                        print("No drivers are currently available. Please wait...")
+                        continue
+
+                payment_method = input("Enter payment method (GCash/PayPal/Debit): ")
+
+                booking_key = str(uuid.uuid4())  # One key per booking attempt
+                with admission_control.admit("booking", user=passenger._id, source=Menu.source) as rejected:
+                    if rejected:
+                        print(AdmissionController.REJECTION_MESSAGES[rejected])
+                        continue
+
+                    if pooled_trip is not None:
+                        passenger.book_trip(pooled_trip, group_size, payment_method, idempotency_key=booking_key, stop=stop)
+                        continue
+
+                    # Create a new trip and book it for the current passenger
+                    new_trip = Trip(route, distance, driver)
+                    if passenger.book_trip(new_trip, group_size, payment_method, idempotency_key=booking_key) is not None:
+                        driver.add_pending_trip(new_trip)  # Only a trip the booking actually saved
+
+            elif choice == "2":  # Cancel a Trip
+                # Fetch trips where the passenger is part of the group
+                passenger_trips, _ = trip_index.query(
+                    passenger_id=passenger._id, status=TripStore.ACTIVE_STATUSES,
+                    newest_first=False, page_size=None
+                )
+
+                if not passenger_trips:
+                    print("You have no trips to cancel.")
+                    continue
+
+                # Display the trips available for cancellation
+                for idx, trip in enumerate(passenger_trips, 1):
+                    print(f"{idx}. Route: {trip['route']}, Distance: {trip['distance']} km, Trip ID: {trip['trip_id']}")
+
+                try:
+                    trip_choice = int(input("Enter the number of the trip to cancel: ")) - 1
+                    if 0 <= trip_choice < len(passenger_trips):
+                        trip_data = passenger_trips[trip_choice]
+
+                        # Reconstruct the driver
+                        driver = fetch_driver(trip_data["driver_id"])
+
+                        if not driver:
+                            print("Error: Driver data for the trip is missing or corrupted.")
+                            continue
+
+                        # Reconstruct the trip object with a valid driver
+                        current_trip = Trip.from_record(trip_data, driver)
+
+                        # Use `cancel_trip` instead of `cancel_passenger`
+                        if current_trip.cancel_trip(passenger, idempotency_key=str(uuid.uuid4())):
+                            print("Trip canceled successfully.")
+                        else:
+                            print("Failed to cancel the trip.")
+                    else:
+                        print("Invalid choice.")
+                except ValueError:
+                    print("Invalid input. Please enter a number.")
+
+
+            elif choice == "3":
+                print("Trip History:")
+                page = 1
+                while True:
+                    history, has_more = passenger.get_trip_history(page)
+                    print(history)
+                    if not has_more or input("Show more trips? (y/n): ").strip().lower() != "y":
+                        break
+                    page += 1
+
+            elif choice == "4":
+                print(passenger.profile())
+
+            elif choice == "5":  # Schedule a Trip
+                route = input("Enter destination: ")
+                distance = float(input("Enter distance (in km): "))
+                try:
+                    pickup_time = datetime.strptime(
+                        input("Enter pickup time (YYYY-MM-DD HH:MM): "), "%Y-%m-%d %H:%M"
+                    )
+                except ValueError:
+                    print("Invalid pickup time. Please use the format YYYY-MM-DD HH:MM.")
+                    continue
+                if pickup_time <= datetime.now():
+                    print("Pickup time must be in the future.")
+                    continue
+
+                group_size = int(input("How many passengers (1-4)? "))
+                if group_size < 1 or group_size > 4:
+                    print("Invalid group size. Please enter a number between 1 and 4.")
+                    continue
+
+                payment_method = input("Enter payment method (GCash/PayPal/Debit): ")
+                with admission_control.admit("booking", user=passenger._id, source=Menu.source) as rejected:
+                    if rejected:
+                        print(AdmissionController.REJECTION_MESSAGES[rejected])
+                        continue
+                    booking = trip_scheduler.schedule(
+                        passenger, route, distance, group_size, payment_method, pickup_time
+                    )
+                print(
+                    f"Trip scheduled for {booking['pickup_time']}. "
+                    f"A driver will be assigned shortly before pickup."
+                )
+
+            elif choice == "6":  # View or cancel scheduled trips
+                bookings = trip_scheduler.get_bookings(passenger._id)
+                if not bookings:
+                    print("You have no scheduled trips.")
+                    continue
+
+                print("\n--- Scheduled Trips ---")
+                for idx, booking in enumerate(bookings, 1):
+                    print(
+                        f"{idx}. Route: {booking['route']}, Distance: {booking['distance']} km, "
+                        f"Group Size: {booking['group_size']}, Pickup: {booking['pickup_time']}"
+                    )
+                if input("Cancel one of them? (y/n): ").strip().lower() != "y":
+                    continue
+                try:
+                    booking_choice = int(input("Enter the number of the scheduled trip to cancel: ")) - 1
+                    if 0 <= booking_choice < len(bookings):
+                        if trip_scheduler.cancel(bookings[booking_choice]["booking_id"]):
+                            print("Scheduled trip canceled.")
+                        else:
+                            print("That trip has already been released to dispatch.")
+                    else:
+                        print("Invalid choice.")
+                except ValueError:
+                    print("Invalid input. Please enter a number.")
+
+            elif choice == "7":
+                print("Logging out...")
+                break
+
+            else:
+                print("Invalid choice. Please try again.")
+
+    @staticmethod
+    def driver_menu(driver):
+        """Menu for driver-specific operations."""
+        while True:
+            print("\n--- Driver Menu ---")
+            print("1. View Pending Trips")
+            print("2. Start a Trip")
+            print("3. End Trip")
+            print("4. View Profile")
+            print("5. Go Online/Offline")
+            print("6. View Demand Forecast")
+            print("7. Logout")
+            choice = input("Enter your choice: ")
+
+            if choice == "1":  # View Pending Trips
+                pending_trips = driver.get_pending_trips()
+                if not pending_trips:
+                    print("No pending trips.")
+                else:
+                    for idx, trip in enumerate(pending_trips, 1):
+                        # Adjusting to correctly access group size
+                        total_fare = sum(trip.group_fare(group) for group in trip.passenger_groups)
+                        passenger_details = ", ".join(
+                            f"{driver._fetch_passenger(group['passenger_id'])._first_name} "
+                            f"{driver._fetch_passenger(group['passenger_id'])._last_name} "
+                            f"({group['group_size']} seat(s))"
+                            for group in trip.passenger_groups
+                        )
+                        print(
+                            f"{idx}. Route: {trip.route}, Distance: {trip.distance} km, "
+                            f"Total Fare: {total_fare:.2f} PHP, Passengers: {passenger_details} (ID: {trip.trip_id})"
+                        )
+                        if len(trip.stops) > 1:
+                            print("   Stops: " + " -> ".join(stop["destination"] for stop in trip.stops))
+
+
+            elif choice == "2":  # Start a Trip
+                pending_trips = driver.get_pending_trips()
+                if not pending_trips:
+                    print("No pending trips.")
+                    continue
+
+                for idx, trip in enumerate(pending_trips, 1):
+                    total_fare = sum(trip.group_fare(group) for group in trip.passenger_groups)
+                    print(
+                        f"{idx}. Route: {trip.route}, Distance: {trip.distance} km, "
+                        f"Total Fare: {total_fare:.2f} PHP (ID: {trip.trip_id})"
+                    )
+
+                try:
+                    trip_choice = int(input("Enter the number of the trip to start: ")) - 1
+                    if 0 <= trip_choice < len(pending_trips):
+                        selected_trip = pending_trips[trip_choice]
+                        driver.start_trip(selected_trip.trip_id)
+                    else:
+                        print("Invalid choice.")
+                except ValueError:
+                    print("Invalid input. Please enter a number.")
+
+            elif choice == "3":  # End a Trip
+                in_progress_trips = driver.get_in_progress_trips()
+                if not in_progress_trips:
+                    print("No trips currently in progress to end.")
+                    continue
+
+                print("\n--- In-Progress Trips ---")
+                for idx, trip in enumerate(in_progress_trips, 1):
+                    passenger_details = ", ".join(
+                        f"{driver._fetch_passenger(group['passenger_id'])._first_name} "
+                        f"{driver._fetch_passenger(group['passenger_id'])._last_name} "
+                        f"({group['group_size']} seat(s))"
+                        for group in trip.passenger_groups
+                    )
+                    print(
+                        f"{idx}. Route: {trip.route}, Distance: {trip.distance} km, "
+                        f"Passengers: {passenger_details}, Trip ID: {trip.trip_id}"
+                    )
+
+                try:
+                    trip_choice = int(input("Enter the number of the trip to end: ")) - 1
+                    if 0 <= trip_choice < len(in_progress_trips):
+                        # end_trip saves the completed trip; the in-progress copy loaded here is stale after it
+                        driver.end_trip(in_progress_trips[trip_choice].trip_id)
+                    else:
+                        print("Invalid choice.")
+                except ValueError:
+                    print("Invalid input. Please enter a number.")
+
+            elif choice == "4":  # View Profile
+                print(driver.profile())
+
+            elif choice == "5":  # Toggle availability
+                if driver_availability.state_of(driver._id) == DriverAvailability.OFFLINE:
+                    driver_availability.go_online(driver._id)
+                    print("You are now online and can receive bookings.")
+                elif driver_availability.go_offline(driver._id):
+                    print("You are now offline and will not receive new bookings.")
+                else:
+                    print("Finish your full or in-progress trips before going offline.")
+                driver.save_to_file("drivers.json")  # Persist the new state
+
+            elif choice == "6":  # Where to position for the next hour
+                try:
+                    from .forecast import demand_forecaster  # Analytics load on first use
+                    hot_zones = demand_forecaster.hot_zones()
+                except ImportError:
+                    print("Demand forecasting needs NumPy (pip install numpy).")
+                    continue
+                if not hot_zones:
+                    print("Not enough completed trips to forecast demand yet.")
+                else:
+                    print("\n--- Expected Demand Next Hour ---")
+                    for zone, demand in hot_zones:
+                        print(f"{zone}: {demand:.2f} trip(s)")
+
+            elif choice == "7":  # Logout
+                driver.save_to_file("drivers.json")  # Save the driver state before logout
+                print("Logging out...")
+                break
+
+            else:
+                print("Invalid choice. Please try again.")
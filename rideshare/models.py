@@ -0,0 +1,692 @@
+"""Passengers, drivers, vehicles, trips and payments."""
+import json
+import random
+import uuid
+from datetime import datetime
+
+from .availability import driver_availability
+from .booking import booking_ledger
+from .cache import profile_cache
+from .ids import id_allocator
+from .query import trip_index
+from .records import append_json_records, file_lock, user_records, write_json_records
+from .storage import trip_store
+
+
+class User:
+    """Abstract class for User."""
+    def __init__(self, first_name, last_name, contact):
+        self._id = str(uuid.uuid4())  # Unique ID
+        self._first_name = first_name
+        self._last_name = last_name
+        self._contact = contact
+        self._email = self._generate_email()  # Auto-generated email
+        self._password = self._generate_password()  # Auto-generated password
+
+    def _generate_email(self):
+        """Generate a unique email address using first and last names."""
+        return id_allocator.next_email(self._first_name, self._last_name)
+
+    @staticmethod
+    def _generate_password():
+        """Generate a random password for the user."""
+        return f"pass{random.randint(1000, 9999)}"
+
+    @classmethod
+    def from_record(cls, record):
+        """Rebuild a user straight from a stored record (no uuid or random work)."""
+        user = cls.__new__(cls)
+        user._id = record["id"]
+        user._first_name = record["first_name"]
+        user._last_name = record["last_name"]
+        user._contact = record["contact"]
+        user._email = record.get("email")
+        user._password = record.get("password")
+        user._hydrate(record)
+        return user
+
+    def _hydrate(self, record):
+        """Restore subclass-specific fields from a stored record."""
+
+    def get_user_details(self):
+        """Return a dictionary containing user details."""
+        return {
+            "id": self._id,
+            "first_name": self._first_name,
+            "last_name": self._last_name,
+            "contact": self._contact,
+            "email": self._email,
+            "password": self._password  # Include password for authentication
+        }
+
+    def save_to_file(self, filename):
+        """Append the user details to a JSON file (allocated emails are unique, so no scan is needed)."""
+        try:
+            append_json_records(filename, [self.get_user_details()])
+        except ValueError:
+            print(f"Error: {filename} could not be read, so {self._first_name} {self._last_name} was not saved.")
+
+
+class Passenger(User):
+    def __init__(self, first_name, last_name, contact):
+        super().__init__(first_name, last_name, contact)
+        self.__trip_ids = []  # Trip IDs (references in the trip store)
+
+    def _hydrate(self, record):
+        self.__trip_ids = list(record.get("trip_ids", []))  # Copy: records are shared through user_records
+
+    def book_trip(self, trip, group_size, payment_method, idempotency_key=None, stop=None):
+        """Book a trip for the passenger with group size.
+
+        `stop` is a RoutePlanner quote when the group joins a pooled trip with its
+        own drop-off; the group then pays the quoted share.
+
+        Retrying with the same idempotency key never takes seats twice: a
+        finished booking returns its recorded fare, and a booking interrupted
+        after its trip was saved resumes on that trip instead of adding the
+        group again.
+        """
+        key = idempotency_key or str(uuid.uuid4())
+        entry = booking_ledger.get(key)
+        if entry is not None and entry["state"] == "done":
+            print("This booking was already processed.")
+            return entry["result"]
+
+        if entry is not None:
+            stored = trip_store.get_trip(entry["trip_id"])
+            if stored is not None:
+                trip = Trip.from_record(stored, fetch_driver(stored["driver_id"]) or trip.driver)
+
+        if any(group.get("booking_key") == key for group in trip.passenger_groups):
+            group = next(group for group in trip.passenger_groups if group.get("booking_key") == key)
+            total_fare = trip.group_fare(group)  # Seats were taken before the interruption
+        else:
+            booking_ledger.begin(key, "book", trip.trip_id)
+            total_fare = trip.add_passenger(self, group_size, booking_key=key, stop=stop)
+
+        if total_fare is not None:
+            payment = Payment(trip, payment_method)
+            payment.process_payment()  # add_passenger has already saved the trip
+            booking_ledger.complete(key, total_fare)
+            print("\nTrip booked successfully!")
+            print(
+                f"  - Route: {trip.route}\n"
+                f"  - Distance: {trip.distance} km\n"
+                f"  - Group Size: {group_size}\n"
+                f"  - Estimated Fare: {total_fare} PHP\n"
+                f"  - Driver: {trip.driver._first_name} {trip.driver._last_name}\n"
+                f"  - Payment Method: {payment_method}\n"
+                f"  - Start Time: {trip.start_time}"
+            )
+        else:
+            booking_ledger.complete(key, None)
+            print("Booking failed due to insufficient seats.")
+        return total_fare
+
+    def profile(self):
+        """Return the profile details of the passenger."""
+        completed_trips, pending_trips = profile_cache.get_or_load(self._id, "trip_counts", self._count_trips)
+
+        return (
+            f"Passenger Profile:\n"
+            f"  - ID: {self._id}\n"
+            f"  - Name: {self._first_name} {self._last_name}\n"
+            f"  - Contact: {self._contact}\n"
+            f"  - Email: {self._email}\n"
+            f"  - Trips Taken: {completed_trips}\n"
+            f"  - Pending Trips: {pending_trips}\n"
+        )
+
+    def _count_trips(self):
+        """Return (completed, pending) trip counts from the trip index."""
+        return (
+            trip_index.count(passenger_id=self._id, status="completed"),
+            trip_index.count(passenger_id=self._id, status="pending"),
+        )
+
+    def get_trip_history(self, page=1, page_size=10):
+        """Fetch one page of this passenger's trips, newest first; return (text, has_more)."""
+        passenger_trips, has_more = profile_cache.get_or_load(
+            self._id, ("history", page, page_size),
+            lambda: trip_index.query(passenger_id=self._id, page=page, page_size=page_size),
+        )
+
+        if not passenger_trips:
+            return ("No trips booked yet." if page == 1 else "No more trips."), False
+
+        first_number = (page - 1) * page_size + 1
+        return "\n".join(
+            f"Trip {idx + first_number}:\n"
+            f"  - Route: {trip['route']}\n"
+            f"  - Distance: {trip['distance']} km\n"
+            f"  - Fare: {self._fare_share(trip)} PHP\n"
+            f"  - Status: {trip['status']}\n"
+            for idx, trip in enumerate(passenger_trips)
+        ), has_more
+
+    def _fare_share(self, trip):
+        """Return this passenger's share of a stored trip's fare."""
+        return sum(
+            group.get("fare", trip["base_fare"] * group["group_size"])
+            for group in trip.get("passenger_groups", []) if group["passenger_id"] == self._id
+        )
+
+
+class Driver(User):
+    def __init__(self, first_name, last_name, contact, vehicle):
+        super().__init__(first_name, last_name, contact)
+        self._vehicle = vehicle
+        self._pending_trip_ids = []
+        self._in_progress_trip_ids = []  # New attribute
+        self._completed_trip_ids = []
+        self._canceled_trip_ids = []
+        self._total_earnings = 0
+
+    def _hydrate(self, record):
+        self._vehicle_obj = None
+        self._vehicle_details = record.get("vehicle_details", {})  # Vehicle is built on first access
+        # Copies: records are shared through user_records
+        self._pending_trip_ids = list(record.get("pending_trip_ids", []))
+        self._in_progress_trip_ids = list(record.get("in_progress_trip_ids", []))
+        self._completed_trip_ids = list(record.get("completed_trip_ids", []))
+        self._canceled_trip_ids = list(record.get("canceled_trip_ids", []))
+        self._total_earnings = record.get("total_earnings", 0)
+
+    @property
+    def _vehicle(self):
+        """The driver's Vehicle, built from the stored details on first access."""
+        if self._vehicle_obj is None:
+            self._vehicle_obj = Vehicle(
+                self._vehicle_details.get("license_plate", "UNKNOWN"),
+                self._vehicle_details.get("model", "UNKNOWN"),
+                self._vehicle_details.get("color", "UNKNOWN"),
+                self._vehicle_details.get("seats", 4),
+            )
+        return self._vehicle_obj
+
+    @_vehicle.setter
+    def _vehicle(self, vehicle):
+        self._vehicle_obj = vehicle
+
+    @property
+    def seat_capacity(self):
+        """Seats each of the driver's trips offers, from the vehicle."""
+        if self._vehicle_obj is None:
+            return self._vehicle_details.get("seats", 4)
+        return self._vehicle_obj.seats
+
+    def get_vehicle(self):
+        """Expose the vehicle object."""
+        return self._vehicle
+
+    def add_pending_trip(self, trip):
+        """Add a trip to the pending trips list and save the driver data."""
+        if trip.trip_id not in self._pending_trip_ids:
+            self._pending_trip_ids.append(trip.trip_id)
+        self.save_to_file("drivers.json")  # Save updated driver details
+
+
+    def _sync_pending_trips(self):
+        """Synchronize driver's pending trips with the driver's trip shard."""
+        pending_trips, _ = trip_index.query(driver_id=self._id, status="pending", newest_first=False, page_size=None)
+        self._pending_trip_ids = [trip["trip_id"] for trip in pending_trips]
+
+    def get_pending_trips(self):
+        """Fetch all pending trips for this driver, oldest first."""
+        pending_trips, _ = trip_index.query(driver_id=self._id, status="pending", newest_first=False, page_size=None)
+        return [Trip.from_record(trip, self) for trip in pending_trips]
+
+    def get_in_progress_trips(self):
+        """Fetch all in-progress trips for this driver, oldest first."""
+        in_progress_trips, _ = trip_index.query(
+            driver_id=self._id, status="in-progress", newest_first=False, page_size=None
+        )
+        return [Trip.from_record(trip, self) for trip in in_progress_trips]
+
+
+
+    def _fetch_passenger(self, passenger_id):
+        """Fetch passenger details based on passenger ID."""
+        return fetch_passenger(passenger_id)
+
+    def start_trip(self, trip_id):
+        """Start a trip and mark it as in-progress."""
+        trip = trip_store.get_trip(trip_id, self._id)
+        if trip is not None and trip["status"] == "pending":
+            trip["status"] = "in-progress"
+
+            # Update driver's trip lists
+            if trip_id in self._pending_trip_ids:
+                self._pending_trip_ids.remove(trip_id)
+            if trip_id not in self._in_progress_trip_ids:
+                self._in_progress_trip_ids.append(trip_id)
+
+            # Save updated trip
+            trip_store.save_trip(trip)
+
+            # Save updated driver state
+            self.save_to_file()
+            print(f"Trip {trip_id} started successfully.")
+            return
+
+        print("Trip not found or already in progress.")
+
+
+
+
+
+
+    def end_trip(self, trip_id):
+        """Mark a trip as completed and update earnings."""
+        trip = trip_store.get_trip(trip_id, self._id)
+        if trip is not None and trip["status"] == "in-progress":
+            trip["status"] = "completed"
+
+            # Finalize fare and update driver's earnings
+            final_fare = trip.get("final_fare") or sum(
+                group.get("fare", trip["base_fare"] * group["group_size"]) for group in trip["passenger_groups"]
+            )
+            trip["final_fare"] = final_fare
+            self._total_earnings += final_fare  # Update total earnings
+
+            # Update driver's lists
+            if trip_id in self._in_progress_trip_ids:
+                self._in_progress_trip_ids.remove(trip_id)
+            if trip_id not in self._completed_trip_ids:
+                self._completed_trip_ids.append(trip_id)
+
+            # Save updated trip (moves it to its month shard)
+            trip_store.save_trip(trip)
+
+            # Persist driver data
+            self.save_to_file("drivers.json")  # Make sure it saves the updated earnings
+            print(f"Trip {trip_id} completed. Final Fare: {final_fare:.2f} PHP.")
+            return
+
+        print("Trip not found or already completed.")
+
+
+
+
+
+
+
+
+
+
+
+    # Trip lists from the furthest state to the earliest
+    TRIP_LISTS = ("completed_trip_ids", "canceled_trip_ids", "in_progress_trip_ids", "pending_trip_ids")
+
+    def _merge_trip_lists(self, stored):
+        """Merge the stored and in-memory trip lists, listing each trip only under the furthest state it reached.
+
+        Another session may have added trips since this driver was loaded, so
+        stored IDs are kept; a trip that has moved on (pending, in progress,
+        completed or canceled) is dropped from the earlier lists.
+        """
+        current = {
+            "pending_trip_ids": self._pending_trip_ids,
+            "in_progress_trip_ids": self._in_progress_trip_ids,
+            "completed_trip_ids": self._completed_trip_ids,
+            "canceled_trip_ids": self._canceled_trip_ids,
+        }
+        merged = {}
+        placed = set()
+        for name in self.TRIP_LISTS:
+            trip_ids = []
+            for trip_id in stored.get(name, []) + current[name]:
+                if trip_id not in placed:
+                    placed.add(trip_id)
+                    trip_ids.append(trip_id)
+            merged[name] = trip_ids
+        self._pending_trip_ids = merged["pending_trip_ids"]
+        self._in_progress_trip_ids = merged["in_progress_trip_ids"]
+        self._completed_trip_ids = merged["completed_trip_ids"]
+        self._canceled_trip_ids = merged["canceled_trip_ids"]
+        return merged
+
+    def save_to_file(self, filename="drivers.json"):
+        """Safely update driver details in the JSON file without overwriting existing data.
+
+        The read-modify-write holds the file's lock and replaces the file
+        atomically, so saves from other threads and processes are not lost. A
+        file that cannot be parsed is left alone rather than overwritten.
+        """
+        with file_lock(filename):
+            try:
+                with open(filename, "r") as file:
+                    drivers = json.load(file)
+            except FileNotFoundError:
+                drivers = []
+            except json.JSONDecodeError:
+                print(f"Error: {filename} could not be read, so driver {self._id} was not saved.")
+                return
+
+            # Look for the driver in the existing data
+            for i, driver in enumerate(drivers):
+                if driver["id"] == self._id:
+                    # Update the driver's details while preserving specific fields
+                    # Drivers are hydrated with their stored earnings, so the in-memory total is current
+                    updated_driver = self.get_user_details()
+
+                    # Merge trip lists so trips saved by other sessions are kept, each in one list only
+                    drivers[i] = {
+                        **driver,  # Preserve existing data
+                        **updated_driver,  # Update with the latest details
+                        **self._merge_trip_lists(driver),
+                    }
+                    drivers[i].pop("available_seats", None)  # Seats are tracked per trip now
+                    saved = drivers[i]
+                    break
+            else:
+                # If the driver is not found, append the new driver data
+                saved = self.get_user_details()
+                drivers.append(saved)
+
+            write_json_records(filename, drivers)
+        profile_cache.invalidate(self._id)
+        driver_availability.register(saved)
+
+
+
+
+
+
+
+
+
+
+    def get_user_details(self): 
+        """Return driver details."""
+        return {
+            "id": self._id,
+            "first_name": self._first_name,
+            "last_name": self._last_name,
+            "contact": self._contact,
+            "email": self._email,
+            "password": self._password,
+            "vehicle_details": self._vehicle.get_vehicle_details() if self._vehicle_obj else self._vehicle_details,
+            "pending_trip_ids": self._pending_trip_ids,
+            "in_progress_trip_ids": self._in_progress_trip_ids,  # Include in-progress trips
+            "completed_trip_ids": self._completed_trip_ids,
+            "canceled_trip_ids": self._canceled_trip_ids,
+            "total_earnings": self._total_earnings,
+            "state": driver_availability.state_of(self._id)
+        }
+
+
+
+    def _count_canceled_trips(self):
+        """Read the driver's canceled-trip count from drivers.json."""
+        driver_data = user_records.by_id("drivers.json", self._id)
+        return len(driver_data.get("canceled_trip_ids", [])) if driver_data else 0
+
+    def profile(self):
+        """Return the profile details of the driver."""
+        canceled_trips = self._count_canceled_trips()  # user_records re-reads drivers.json only when it changes
+
+        return (
+            f"Driver Profile:\n"
+            f"  - ID: {self._id}\n"
+            f"  - Name: {self._first_name} {self._last_name}\n"
+            f"  - Contact: {self._contact}\n"
+            f"  - Email: {self._email}\n"
+            f"  - Vehicle: {self._vehicle.model} ({self._vehicle.color} - {self._vehicle.license_plate})\n"
+            f"  - Status: {driver_availability.state_of(self._id)}\n"
+            f"  - Pending Trips: {len(self._pending_trip_ids)}\n"
+            f"  - Completed Trips: {len(self._completed_trip_ids)}\n"
+            f"  - Canceled Trips: {canceled_trips}\n"
+            f"  - Total Earnings: {self._total_earnings} PHP\n"
+        )
+
+
+class Vehicle:
+    def __init__(self, license_plate, model, color, seats=4):
+        self.license_plate = license_plate
+        self.model = model
+        self.color = color
+        self.seats = seats  # Passenger seat capacity
+
+    @staticmethod
+    def generate_vehicle():
+        """Generate a random vehicle."""
+        license_plate = id_allocator.next_license_plate()
+        model = random.choice(["Toyota", "Honda", "Ford", "Tesla", "Chevrolet"])
+        color = random.choice(["Red", "Blue", "Black", "White", "Gray"])
+        return Vehicle(license_plate, model, color)
+
+    def get_vehicle_details(self):
+        """Return a dictionary of vehicle details."""
+        return {
+            "license_plate": self.license_plate,
+            "model": self.model,
+            "color": self.color,
+            "seats": self.seats
+        }
+
+
+class Trip:
+    def __init__(self, route, distance, driver, start_time=None):
+        self.trip_id = id_allocator.next_trip_id()  # Sorts by creation time
+        self.route = route
+        self.distance = distance
+        self.base_fare = self.calculate_base_fare(distance)
+        self.stops = [{"destination": route, "distance": distance}]  # Drop-offs in order, km from the origin
+        self.driver = driver
+        self.passenger_groups = []
+        self.capacity = driver.seat_capacity  # Each trip has its own seats
+        self.available_seats = self.capacity
+        self.start_time = (start_time or datetime.now()).strftime("%Y-%m-%d %H:%M:%S")  # Pickup time
+        self.status = "pending"
+        self.final_fare = None
+
+
+    @classmethod
+    def from_record(cls, record, driver):
+        """Rebuild a trip from its stored details without generating a new id or start time."""
+        trip = cls.__new__(cls)
+        trip.trip_id = record["trip_id"]
+        trip.route = record["route"]
+        trip.distance = record["distance"]
+        trip.base_fare = record["base_fare"]
+        trip.stops = [dict(stop) for stop in record.get("stops") or [{"destination": trip.route, "distance": trip.distance}]]
+        trip.driver = driver
+        trip.passenger_groups = [dict(group) for group in record.get("passenger_groups", [])]
+        trip.available_seats = record["available_seats"]
+        trip.capacity = record.get("capacity", trip.available_seats + sum(
+            group["group_size"] for group in trip.passenger_groups
+        ))
+        trip.start_time = record["start_time"]
+        trip.status = record["status"]
+        trip.final_fare = record.get("final_fare")
+        return trip
+
+    @staticmethod
+    def calculate_base_fare(distance):
+        """Calculate the base fare for the trip."""
+        base_fare = 50
+        return base_fare + (distance * 10)
+
+    def has_room_for(self, group_size):
+        """Prevent exceeding seat capacity."""
+        if self.available_seats - group_size < 0:
+            print(f"Error: Not enough seats available for {group_size} passengers.")
+            return False
+        return True
+
+    def group_fare(self, group):
+        """Fare of one passenger group: its pooled share if it has one, otherwise base fare per seat."""
+        return group.get("fare", self.base_fare * group["group_size"])
+
+    def add_passenger(self, passenger, group_size, booking_key=None, stop=None):
+        """Add a passenger and group size to the trip, optionally with its own stop from RoutePlanner."""
+        if self.has_room_for(group_size):
+            total_fare = self.base_fare * group_size if stop is None else stop["fare"]
+            group = {"passenger_id": passenger._id, "group_size": group_size}
+            if booking_key:
+                group["booking_key"] = booking_key  # Lets a retried booking recognise its seats
+            if stop is not None:
+                self._add_stop(stop, group)
+            else:
+                group.update(self.route_stop())  # Rides to the trip's own destination
+            self.passenger_groups.append(group)
+            self.available_seats -= group_size
+
+            # The trip record is the source of truth for taken seats
+            self.save_to_file()
+
+            print(
+                f"Passenger {passenger._first_name} {passenger._last_name} "
+                f"added with {group_size} seat(s). Estimated fare: {total_fare} PHP."
+            )
+            return total_fare
+        return None
+
+    def route_stop(self):
+        """Return the drop-off at the trip's own destination (the route it was booked for)."""
+        for stop in self.stops:
+            if stop["destination"] == self.route:
+                return dict(stop)
+        return {"destination": self.route, "distance": self.distance}
+
+    def _add_stop(self, stop, group):
+        """Apply a RoutePlanner quote: insert the drop-off and update every group's fare share."""
+        if stop["new_stop"]:
+            self.stops.insert(stop["position"], {"destination": stop["destination"], "distance": stop["distance"]})
+        self.distance = stop["route_km"]
+        for existing, fare in zip(self.passenger_groups, stop["fares"]):
+            existing["fare"] = fare
+        group.update({"destination": stop["destination"], "distance": stop["distance"], "fare": stop["fare"]})
+
+    def cancel_trip(self, passenger, idempotency_key=None):
+        """Cancel a trip and update related data for the given passenger."""
+        entry = booking_ledger.get(idempotency_key) if idempotency_key else None
+        if entry is not None and entry["state"] == "done":
+            return entry["result"]
+
+        if self.status == "completed":
+            print(f"Error: Cannot cancel a completed trip {self.trip_id}.")
+            return False
+
+        # Remove the passenger from the trip
+        updated_groups = [
+            group for group in self.passenger_groups
+            if group["passenger_id"] != passenger._id
+        ]
+        if len(updated_groups) == len(self.passenger_groups):
+            if entry is not None and entry["trip_id"] == self.trip_id:
+                # Interrupted after the removal was saved: finish the retry as a success
+                booking_ledger.complete(idempotency_key, True)
+                return True
+            print(f"Error: Passenger {passenger._first_name} {passenger._last_name} not part of this trip.")
+            return False
+
+        if idempotency_key:
+            booking_ledger.begin(idempotency_key, "cancel", self.trip_id)
+
+        # Give back exactly the seats of the removed groups
+        removed_seats = sum(group["group_size"] for group in self.passenger_groups) - sum(
+            group["group_size"] for group in updated_groups
+        )
+        self.passenger_groups = updated_groups
+        self.available_seats += removed_seats
+        if self.passenger_groups:  # Drop stops nobody gets off at any more
+            destinations = {group.get("destination", self.route) for group in self.passenger_groups}
+            remaining = [stop for stop in self.stops if stop["destination"] in destinations]
+            if remaining and len(remaining) < len(self.stops):
+                from .routing import route_planner  # routing imports models
+
+                self.stops = remaining
+                self.distance = route_planner.route_length(remaining)  # The route no longer passes the dropped stops
+
+        if not self.passenger_groups:  # Cancel the trip entirely if no passengers remain
+            self.status = "canceled"
+            if self.trip_id not in self.driver._canceled_trip_ids:
+                self.driver._canceled_trip_ids.append(self.trip_id)
+            print(f"Trip {self.trip_id} canceled as no passengers remain.")
+
+        # Persist changes
+        self.save_to_file()
+        profile_cache.invalidate(passenger._id)  # No longer on the trip, so the save did not cover them
+        self.driver.save_to_file("drivers.json")
+        if idempotency_key:
+            booking_ledger.complete(idempotency_key, True)
+        return True
+
+
+
+
+
+
+
+
+
+    def finalize_fare(self):
+        """Calculate and finalize the total fare when the trip ends."""
+        self.final_fare = sum(self.group_fare(group) for group in self.passenger_groups)
+        return self.final_fare
+
+
+    def get_trip_details(self):
+        """Return trip details as a dictionary."""
+        return {
+            "trip_id": self.trip_id,
+            "route": self.route,
+            "distance": self.distance,
+            "base_fare": self.base_fare,
+            "stops": self.stops,
+            "driver_id": self.driver._id,
+            "passenger_groups": self.passenger_groups,  # Use the updated consistent format
+            "capacity": self.capacity,
+            "available_seats": self.available_seats,
+            "start_time": self.start_time,
+            "status": self.status,
+            "final_fare": self.final_fare,
+        }
+
+
+
+    def save_to_file(self):
+        """Ensure all trip details are saved to the trip's shard."""
+        trip_store.save_trip(self.get_trip_details())
+
+
+class Payment:
+    def __init__(self, trip, payment_method):
+        self.trip = trip  # Trip object
+        self.payment_method = payment_method  # Payment method (e.g., GCash)
+        self.payment_status = "Pending"  # Default status
+
+    def process_payment(self):
+        """Process the payment."""
+        self.payment_status = "Completed"
+        print(f"Payment processed successfully via {self.payment_method}")
+
+    def get_payment_details(self):
+        """Return payment details."""
+        return {
+            "trip": self.trip.get_trip_details(),
+            "payment_method": self.payment_method,
+            "payment_status": self.payment_status
+        }
+
+
+def fetch_passenger(passenger_id):
+    """Fetch passenger details based on passenger ID."""
+    record = user_records.by_id("passengers.json", passenger_id)
+    return Passenger.from_record(record) if record else None
+
+def fetch_driver(driver_id):
+    """Fetch driver details based on driver ID."""
+    record = user_records.by_id("drivers.json", driver_id)
+    return Driver.from_record(record) if record else None
+
+def find_available_driver(exclude=()):
+    """Find an available driver (online, not on a trip and not on a full trip), skipping IDs in exclude."""
+    driver_data = driver_availability.pick(exclude)
+    if driver_data is None:
+        print("No available drivers found.")
+        return None
+    # Hydrate from the current file: another session may have changed the driver's earnings or trips
+    return Driver.from_record(user_records.by_id("drivers.json", driver_data["id"]) or driver_data)
@@ -0,0 +1,250 @@
+"""Staged booking pipeline connected by queues."""
+import queue
+import threading
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime
+
+from .admission import AdmissionController, admission_control
+from .booking import booking_ledger
+from .models import Trip, fetch_driver, find_available_driver
+from .routing import route_planner
+from .storage import trip_store
+
+
+def quote_shared_ride(pending_trips, route, distance, group_size):
+    """Return (trip record, quote) for the pending trip that takes the group for the smallest detour, or (None, None)."""
+    return route_planner.best_trip(pending_trips, route, distance, group_size)
+
+
+class PipelineStage:
+    """A booking stage: a queue drained by a worker thread."""
+    def __init__(self, name, handler):
+        self.name = name
+        self.handler = handler
+        self.queue = queue.Queue()
+        self.processed = 0
+        self.in_flight = 0  # Jobs handed to the process pool and not yet back
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name=f"booking-{name}", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def put(self, job):
+        self.queue.put(job)
+
+    def _run(self):
+        while True:
+            job = self.queue.get()
+            if job is None:  # Shutdown sentinel
+                break
+            try:
+                self.handler(job)
+            except Exception as e:
+                job["pipeline"]._fail(job, e)
+
+    def stop(self):
+        self.queue.put(None)
+        self._thread.join()
+
+    def stats(self):
+        """Return queue depth and counters for tuning."""
+        return {"queued": self.queue.qsize(), "in_flight": self.in_flight, "processed": self.processed}
+
+
+class BookingPipeline:
+    """Staged booking: match -> dispatch -> persist, connected by queues.
+
+    The match stage looks for a pending trip the group can share (only for
+    bookings submitted with pool=True), dispatch assigns the longest-waiting
+    available driver otherwise, and persist books through Passenger.book_trip,
+    so payment, the booking ledger and resuming an interrupted booking work as
+    they do in the menus. All file writes go through the single persist stage,
+    which bounds throughput. Route matching takes microseconds, so it runs in
+    its stage thread; pass max_workers to move it to a process pool instead
+    (only worth it if it becomes expensive).
+    """
+    def __init__(self, max_workers=0, pool_candidates=50):
+        self._pool = ProcessPoolExecutor(max_workers=max_workers) if max_workers else None
+        self.pool_candidates = pool_candidates  # Pending trips considered for sharing
+        self._dispatching = set()  # Drivers matched to bookings that are not saved yet
+        self._dispatch_lock = threading.Lock()
+        self._outstanding = 0
+        self._idle = threading.Condition()
+        self.stages = {
+            "match": PipelineStage("match", self._match),
+            "dispatch": PipelineStage("dispatch", self._dispatch),
+            "persist": PipelineStage("persist", self._persist),
+        }
+        for stage in self.stages.values():
+            stage.start()
+
+    def threads(self):
+        """Return the stage threads (the scheduler sends their output to its log)."""
+        return [stage._thread for stage in self.stages.values()]
+
+    def submit(self, passenger, route, distance, group_size, payment_method, idempotency_key=None,
+               source=None, start_time=None, pool=False):
+        """Queue a booking and return a Future resolving to the booked Trip (or None).
+
+        Bookings pass admission control first: one rejected by a rate limit or
+        shed under load resolves to None without entering the stages. Pass the
+        client's source (see request_source()) for bookings made on a client's
+        behalf; they are then rate limited per passenger and per source like
+        menu bookings. In-process callers leave it None and only wait for a
+        concurrency slot. start_time is the pickup time of a new trip (now by
+        default); pool=True books a seat on a pending trip when sharing it is
+        cheaper than riding alone.
+        """
+        key = idempotency_key or str(uuid.uuid4())
+        entry = booking_ledger.get(key)
+        if entry is not None and entry["state"] == "done":
+            # Already booked: answer from the store without running the stages again
+            future = Future()
+            stored = trip_store.get_trip(entry["trip_id"]) if entry.get("result") is not None else None
+            future.set_result(
+                Trip.from_record(stored, fetch_driver(stored["driver_id"])) if stored else None
+            )
+            return future
+
+        user = passenger._id if source is not None else None
+        rejected = admission_control.acquire("booking", user=user, source=source)
+        if rejected:
+            print(AdmissionController.REJECTION_MESSAGES[rejected])
+            future = Future()
+            future.set_result(None)
+            return future
+
+        job = {
+            "pipeline": self,
+            "future": Future(),
+            "passenger": passenger,
+            "route": route,
+            "distance": distance,
+            "group_size": group_size,
+            "payment_method": payment_method,
+            "key": key,
+            "start_time": start_time,
+            "pool": pool,
+        }
+        with self._idle:
+            self._outstanding += 1
+        self.stages["match"].put(job)
+        return job["future"]
+
+    def queue_depths(self):
+        """Return per-stage queue depth and counters."""
+        return {name: stage.stats() for name, stage in self.stages.items()}
+
+    def close(self):
+        """Wait for outstanding bookings, then stop the stages and the pool."""
+        with self._idle:
+            while self._outstanding:
+                self._idle.wait()
+        for stage in self.stages.values():
+            stage.stop()
+        if self._pool is not None:
+            self._pool.shutdown()
+
+    # --- Stage handlers ---
+
+    def _match(self, job):
+        entry = booking_ledger.get(job["key"])
+        stored = trip_store.get_trip(entry["trip_id"]) if entry is not None else None
+        driver = fetch_driver(stored["driver_id"]) if stored is not None else None
+        if driver is not None:
+            # An interrupted attempt already saved this trip: book_trip resumes on it
+            job["trip"] = Trip.from_record(stored, driver)
+            self.stages["match"].processed += 1
+            self.stages["persist"].put(job)
+            return
+        if not job["pool"]:
+            self.stages["match"].processed += 1
+            self.stages["dispatch"].put(job)
+            return
+        pending_trips = route_planner.candidate_trips(job["start_time"] or datetime.now(), self.pool_candidates)
+        self._offload(
+            "match", job, self._matched, quote_shared_ride,
+            pending_trips, job["route"], job["distance"], job["group_size"],
+        )
+
+    def _matched(self, job, offer):
+        record, stop = offer
+        driver = fetch_driver(record["driver_id"]) if record is not None and stop["fare"] < stop["solo_fare"] else None
+        if driver is None:
+            self.stages["dispatch"].put(job)
+            return
+        job["trip"] = Trip.from_record(record, driver)
+        job["stop"] = stop
+        self.stages["persist"].put(job)
+
+    def _dispatch(self, job):
+        with self._dispatch_lock:
+            driver = find_available_driver(exclude=self._dispatching)
+            if driver is not None:
+                self._dispatching.add(driver._id)  # Spread bookings in flight over other drivers
+        self.stages["dispatch"].processed += 1
+        if driver is None:
+            self._finish(job, None)
+            return
+        job["trip"] = Trip(job["route"], job["distance"], driver, start_time=job["start_time"])
+        job["new_trip"] = True
+        self.stages["persist"].put(job)
+
+    def _persist(self, job):
+        """Single writer: the only stage that touches the data files."""
+        trip = job["trip"]
+        try:
+            fare = job["passenger"].book_trip(
+                trip, job["group_size"], job["payment_method"], idempotency_key=job["key"], stop=job.get("stop")
+            )
+            if fare is not None and job.get("stop") is None:
+                trip.driver.add_pending_trip(trip)  # Only a trip the booking actually saved
+        finally:
+            if job.get("new_trip"):
+                with self._dispatch_lock:
+                    self._dispatching.discard(trip.driver._id)
+        self.stages["persist"].processed += 1
+        self._finish(job, trip if fare is not None else None)
+
+    # --- Helpers ---
+
+    def _offload(self, stage_name, job, on_result, func, *args):
+        """Run a matching or quoting step (on the process pool if there is one) and continue with its result."""
+        stage = self.stages[stage_name]
+        with stage._lock:
+            stage.in_flight += 1
+
+        def done(future):
+            with stage._lock:
+                stage.in_flight -= 1
+                stage.processed += 1
+            try:
+                on_result(job, future.result())
+            except Exception as e:
+                self._fail(job, e)
+
+        if self._pool is None:
+            future = Future()
+            try:
+                future.set_result(func(*args))
+            except Exception as e:
+                future.set_exception(e)
+            done(future)
+        else:
+            self._pool.submit(func, *args).add_done_callback(done)
+
+    def _finish(self, job, result):
+        job["future"].set_result(result)
+        self._done()
+
+    def _fail(self, job, error):
+        job["future"].set_exception(error)
+        self._done()
+
+    def _done(self):
+        admission_control.release("booking")  # Frees the concurrency slot taken in submit()
+        with self._idle:
+            self._outstanding -= 1
+            self._idle.notify_all()
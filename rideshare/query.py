@@ -0,0 +1,272 @@
+"""Trip search over in-memory secondary indexes."""
+import bisect
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from itertools import islice
+
+from .storage import TripStore, trip_store
+
+
+class TripIndex:
+    """Trip search over in-memory secondary indexes, kept current with the trip shards.
+
+    Trips are indexed by passenger, driver, status and route token, plus one
+    list sorted by start time. A query intersects the matching ID sets and then
+    walks them in time order, stopping as soon as the requested page is full.
+
+    The active shards and open months are indexed up front. Before every
+    query their modification times and sizes are checked, and a shard written
+    since it was read (by this process or another one, such as a bulk import)
+    is indexed again. A closed month is read through the archive index when a
+    query pages into it; at most max_closed_months of them stay indexed,
+    least recently used dropped first. count() reads the closed months it
+    needs one at a time without keeping them.
+    """
+    def __init__(self, store, max_closed_months=12):
+        self.store = store
+        self.max_closed_months = max_closed_months
+        self._trips = {}  # trip_id -> stored trip record
+        self._by_start = []  # Sorted (start_time, trip_id) pairs
+        self._by_passenger = {}  # passenger_id -> set of trip IDs
+        self._by_driver = {}
+        self._by_status = {}
+        self._by_token = {}  # Lowercased route word -> set of trip IDs
+        self._shards = {}  # shard key -> (file signature when read, IDs of its trips)
+        self._closed_loaded = OrderedDict()  # Indexed closed months, least recently used first
+        self._warm = False
+        self._lock = threading.RLock()
+
+    def warm(self):
+        """Index the active shards and open months once; closed segments are left for later."""
+        with self._lock:
+            if self._warm:
+                return
+            self._warm = True
+            self._sync()
+
+    def _sync(self):
+        """Index again every tracked shard file whose signature changed since it was read."""
+        signatures = self.store.shard_signatures(self._closed_loaded)
+        changed = [
+            key for key in set(signatures) | set(self._shards)
+            if signatures.get(key) != self._shards.get(key, (None,))[0]
+        ]
+        dropped = set()
+        for key in changed:
+            _, old_ids = self._shards.pop(key, (None, set()))
+            if key not in signatures:
+                dropped |= old_ids  # Shard removed (an open month was sealed)
+                continue
+            trips = self.store.read_shard(key)
+            trip_ids = {trip["trip_id"] for trip in trips}
+            self._shards[key] = (signatures[key], trip_ids)
+            for trip in trips:
+                if self._trips.get(trip["trip_id"]) != trip:
+                    self._add(trip)
+            dropped |= old_ids - trip_ids
+        for trip_id in dropped:
+            if not any(trip_id in trip_ids for _, trip_ids in self._shards.values()):
+                self._remove(trip_id)  # Moved to a closed month that is not indexed, or deleted
+
+    def _matching_months(self, passenger_id=None, driver_id=None, status=None, start=None, end=None, **_):
+        """Return the closed months, oldest first, that may hold matches."""
+        if status is not None:
+            statuses = (status,) if isinstance(status, str) else status
+            if all(value in TripStore.ACTIVE_STATUSES for value in statuses):
+                return []  # Closed segments only hold finished trips
+        start, end = self._as_text(start), self._as_text(end)
+        return [
+            month for month in self.store.closed_months(driver_id=driver_id, passenger_id=passenger_id)
+            if (not start or month >= start[:7]) and (not end or month <= end[:7])
+        ]
+
+    def _unloaded_months(self, **filters):
+        """Return the matching closed months that are not indexed, marking the indexed ones as used."""
+        unloaded = []
+        for month in self._matching_months(**filters):
+            if month in self._closed_loaded:
+                self._closed_loaded.move_to_end(month)
+            else:
+                unloaded.append(month)
+        return unloaded
+
+    def _load_month(self, month):
+        self._closed_loaded[month] = None
+        self._sync()
+
+    def _trim(self):
+        """Drop the least recently used closed months beyond max_closed_months."""
+        while len(self._closed_loaded) > self.max_closed_months:
+            month, _ = self._closed_loaded.popitem(last=False)
+            _, trip_ids = self._shards.pop(("closed", month), (None, set()))
+            for trip_id in trip_ids:
+                if not any(trip_id in other for _, other in self._shards.values()):
+                    self._remove(trip_id)
+
+    @staticmethod
+    def _as_text(moment):
+        return moment.strftime("%Y-%m-%d %H:%M:%S") if isinstance(moment, datetime) else moment
+
+    @staticmethod
+    def _tokens(route):
+        return set(route.lower().split())
+
+    @staticmethod
+    def fare_of(trip):
+        """Final fare of a finished trip, otherwise its base fare."""
+        final_fare = trip.get("final_fare")
+        return final_fare if final_fare is not None else trip.get("base_fare", 0)
+
+    def _keys(self, trip):
+        """Return the (index, key) pairs a trip is filed under."""
+        keys = [(self._by_driver, trip["driver_id"]), (self._by_status, trip.get("status"))]
+        keys += [(self._by_passenger, group["passenger_id"]) for group in trip.get("passenger_groups", [])]
+        keys += [(self._by_token, token) for token in self._tokens(trip.get("route", ""))]
+        return keys
+
+    def _add(self, trip):
+        trip_id = trip["trip_id"]
+        self._remove(trip_id)
+        self._trips[trip_id] = trip
+        bisect.insort(self._by_start, (trip.get("start_time", ""), trip_id))
+        for index, key in self._keys(trip):
+            index.setdefault(key, set()).add(trip_id)
+
+    def _remove(self, trip_id):
+        trip = self._trips.pop(trip_id, None)
+        if trip is None:
+            return
+        position = bisect.bisect_left(self._by_start, (trip.get("start_time", ""), trip_id))
+        if position < len(self._by_start) and self._by_start[position][1] == trip_id:
+            del self._by_start[position]
+        for index, key in self._keys(trip):
+            trip_ids = index.get(key)
+            if trip_ids is not None:
+                trip_ids.discard(trip_id)
+                if not trip_ids:
+                    del index[key]
+
+    def on_trip_saved(self, trip):
+        """Refresh the indexes for an inserted or updated trip."""
+        with self._lock:
+            if self._warm:  # Otherwise warm() picks the trip up from the store
+                self._add(trip)
+
+    def get(self, trip_id):
+        with self._lock:
+            self.warm()
+            self._sync()
+            return self._trips.get(trip_id) or self.store.get_trip(trip_id)
+
+    # --- Queries ---
+
+    def _route_matches(self, route):
+        """Return trip IDs whose route contains every word of the search text."""
+        matches = None
+        for word in route.lower().split():
+            trip_ids = set()
+            for token, token_trip_ids in self._by_token.items():
+                if word in token:
+                    trip_ids |= token_trip_ids
+            matches = trip_ids if matches is None else matches & trip_ids
+        return matches
+
+    def _candidates(self, passenger_id, driver_id, status, route):
+        """Intersect the index sets for the given filters; None means no index filter applies."""
+        sets = []
+        if passenger_id is not None:
+            sets.append(self._by_passenger.get(passenger_id, set()))
+        if driver_id is not None:
+            sets.append(self._by_driver.get(driver_id, set()))
+        if status is not None:
+            statuses = (status,) if isinstance(status, str) else status
+            sets.append(set().union(*(self._by_status.get(value, set()) for value in statuses)))
+        if route:
+            sets.append(self._route_matches(route) or set())
+        if not sets:
+            return None
+        sets.sort(key=len)
+        return set.intersection(*sets)
+
+    def _iter_matches(self, passenger_id=None, driver_id=None, status=None, route=None,
+                      start=None, end=None, min_fare=None, max_fare=None, newest_first=True):
+        """Yield matching trips in start-time order without building the full result."""
+        start, end = self._as_text(start), self._as_text(end)
+        candidates = self._candidates(passenger_id, driver_id, status, route)
+
+        if candidates is not None and len(candidates) < len(self._by_start) // 8:
+            # Small result set: sort the candidates instead of walking the whole time index
+            ordered = sorted((self._trips[trip_id].get("start_time", ""), trip_id) for trip_id in candidates)
+        else:
+            low = bisect.bisect_left(self._by_start, (start,)) if start else 0
+            high = bisect.bisect_right(self._by_start, (end, "\uffff")) if end else len(self._by_start)
+            ordered = self._by_start[low:high]
+        if newest_first:
+            ordered = reversed(ordered)
+
+        route_text = " ".join(route.lower().split()) if route else None
+        for start_time, trip_id in ordered:
+            if candidates is not None and trip_id not in candidates:
+                continue
+            if (start and start_time < start) or (end and start_time > end):
+                continue
+            trip = self._trips[trip_id]
+            fare = self.fare_of(trip)
+            if (min_fare is not None and fare < min_fare) or (max_fare is not None and fare > max_fare):
+                continue
+            if route_text and route_text not in " ".join(trip["route"].lower().split()):
+                continue  # Every word matched, but not as one phrase
+            yield trip
+
+    def query(self, page=1, page_size=20, **filters):
+        """Return (trips on the page, whether more pages follow) for the given filters.
+
+        Filters: passenger_id, driver_id, status (one or several), route
+        (substring), start/end (datetime or "YYYY-MM-DD HH:MM:SS"), min_fare,
+        max_fare and newest_first. page_size=None returns every match.
+        Closed months are read one at a time, in page order, until the page
+        ends before the first month still unread.
+        """
+        with self._lock:
+            self.warm()
+            self._sync()
+            unloaded = self._unloaded_months(**filters)
+            if page_size is None:
+                for month in unloaded:
+                    self._load_month(month)
+                trips = list(self._iter_matches(**filters))
+                self._trim()
+                return trips, False
+            newest_first = filters.get("newest_first", True)
+            offset = (page - 1) * page_size
+            while True:
+                trips = list(islice(self._iter_matches(**filters), offset, offset + page_size + 1))
+                if not unloaded:
+                    break
+                next_month = unloaded[-1] if newest_first else unloaded[0]
+                if len(trips) > page_size:
+                    last_month = trips[-1].get("start_time", "")[:7]
+                    if (last_month > next_month) if newest_first else (last_month < next_month):
+                        break  # Nothing in the unread months can land on this page
+                self._load_month(unloaded.pop() if newest_first else unloaded.pop(0))
+            self._trim()
+            return trips[:page_size], len(trips) > page_size
+
+    def count(self, **filters):
+        """Return how many trips match the filters; closed months that are not indexed are read but not kept."""
+        with self._lock:
+            self.warm()
+            self._sync()
+            total = sum(1 for _ in self._iter_matches(**filters))
+            for month in self._unloaded_months(**filters):
+                scratch = TripIndex(self.store)
+                for trip in self.store.read_shard(("closed", month)):
+                    if trip["trip_id"] not in self._trips:
+                        scratch._add(trip)
+                total += sum(1 for _ in scratch._iter_matches(**filters))
+            return total
+
+
+trip_index = TripIndex(trip_store)
+trip_store.add_listener(trip_index.on_trip_saved)
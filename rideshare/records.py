@@ -0,0 +1,143 @@
+"""JSON list files holding passenger and driver records."""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+LOCK_TIMEOUT = 10.0  # Seconds after which a lock file is treated as left by a crashed process
+
+
+@contextmanager
+def file_lock(filename, timeout=LOCK_TIMEOUT):
+    """Hold an exclusive lock file next to filename, shared by every thread and process using it."""
+    lock_path = filename + ".lock"
+    while True:
+        try:
+            descriptor = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock_path) > timeout:
+                    os.remove(lock_path)  # Left behind by a crashed process
+                    continue
+            except FileNotFoundError:
+                continue  # Released meanwhile
+            time.sleep(0.005)
+    try:
+        yield
+    finally:
+        os.close(descriptor)
+        os.remove(lock_path)
+
+
+def write_json_records(filename, records):
+    """Replace a JSON list file atomically, so readers never see it half-written; hold file_lock around it."""
+    temp_path = filename + ".tmp"
+    with open(temp_path, "w") as file:
+        json.dump(records, file, indent=4)
+    os.replace(temp_path, filename)
+    user_records.invalidate(filename)
+
+
+def append_json_records(filename, records):
+    """Append records to a JSON list file in place, without rewriting what is already there."""
+    if not records:
+        return
+    body = ",\n".join(json.dumps(record, indent=4) for record in records)
+    with file_lock(filename):
+        _append_body(filename, body)
+
+
+def _append_body(filename, body):
+    try:
+        with open(filename, "rb+") as file:
+            # Walk back from the end to the closing bracket of the list
+            position = file.seek(0, os.SEEK_END)
+            tail = b""
+            while position > 0 and not tail.strip():
+                position -= 1
+                file.seek(position)
+                tail = file.read(1)
+            if not tail.strip():  # Empty file
+                file.seek(0)
+                file.truncate()
+                file.write(("[\n" + body + "\n]").encode("utf-8"))
+                return
+            if tail != b"]":
+                raise ValueError(f"{filename} does not hold a JSON list")
+
+            before = position
+            previous = b""
+            while before > 0 and not previous.strip():
+                before -= 1
+                file.seek(before)
+                previous = file.read(1)
+            separator = "\n" if previous == b"[" else ",\n"
+            file.seek(position)
+            file.truncate()
+            file.write((separator + body + "\n]").encode("utf-8"))
+    except FileNotFoundError:
+        with open(filename, "w") as file:
+            file.write("[\n" + body + "\n]")
+    finally:
+        user_records.invalidate(filename)
+
+
+class UserRecords:
+    """Cached passenger and driver records, indexed by ID and email.
+
+    A file is parsed again only when its size or modification time changes,
+    so logins and lookups do not re-read the whole file on every action.
+    """
+    def __init__(self):
+        self._files = {}  # filename -> (file signature, records, by ID, lists by email)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _signature(filename):
+        try:
+            stat = os.stat(filename)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self, filename):
+        signature = self._signature(filename)
+        with self._lock:
+            cached = self._files.get(filename)
+            if cached is not None and cached[0] == signature:
+                return cached
+            try:
+                with open(filename, "r") as file:
+                    records = json.load(file)
+            except (FileNotFoundError, json.JSONDecodeError):
+                records = []
+            by_email = {}
+            for record in records:
+                by_email.setdefault(record.get("email"), []).append(record)  # Legacy emails may repeat
+            cached = (signature, records, {record.get("id"): record for record in records}, by_email)
+            self._files[filename] = cached
+            return cached
+
+    def warm(self, *filenames):
+        for filename in filenames:
+            self._load(filename)
+
+    def all(self, filename):
+        return self._load(filename)[1]
+
+    def by_id(self, filename, user_id):
+        return self._load(filename)[2].get(user_id)
+
+    def by_email(self, filename, email):
+        """Return every record with the given email, in file order."""
+        return self._load(filename)[3].get(email, [])
+
+    def invalidate(self, filename):
+        """Forget a file after writing it, in case the write kept its size and timestamp."""
+        with self._lock:
+            self._files.pop(filename, None)
+
+
+user_records = UserRecords()
@@ -0,0 +1,202 @@
+"""Multi-stop route planning for pooled trips."""
+import json
+import math
+from datetime import timedelta
+
+from .models import Trip
+from .query import trip_index
+
+ORIGIN = ""  # Trips leave from the dispatch point; entered distances are measured from it
+
+
+def place_key(name):
+    """Normalize a place name so spelling variants share cached distances."""
+    return " ".join(name.lower().split())
+
+
+class DistanceMatrix:
+    """Pairwise distances between places, cached once computed.
+
+    Known distances are read from distances.json ([{"from", "to", "km"}]) when
+    it exists. Other pairs are estimated from each place's distance to the
+    origin, assuming the two directions are 60 degrees apart:
+    sqrt(a^2 + b^2 - a*b), which is exact for the origin itself.
+    """
+    def __init__(self, filename="distances.json", maxsize=100000):
+        self.filename = filename
+        self.maxsize = maxsize
+        self._known = None  # (place, place) -> km, loaded on first miss
+        self._from_origin = {ORIGIN: 0.0}
+        self._cache = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _load_known(self):
+        self._known = {}
+        try:
+            with open(self.filename, "r") as file:
+                for entry in json.load(file):
+                    a, b = place_key(entry["from"]), place_key(entry["to"])
+                    self._known[(a, b) if a < b else (b, a)] = float(entry["km"])
+        except (FileNotFoundError, json.JSONDecodeError, KeyError, TypeError, ValueError):
+            pass
+
+    def add_place(self, place, distance_from_origin):
+        """Remember how far a place is from the origin; the first entered distance sticks, keeping cached estimates valid."""
+        self._from_origin.setdefault(place, distance_from_origin)
+
+    def distance(self, a, b):
+        if a == b:
+            return 0.0
+        key = (a, b) if a < b else (b, a)
+        km = self._cache.get(key)
+        if km is not None:
+            self.hits += 1
+            return km
+
+        self.misses += 1
+        if self._known is None:
+            self._load_known()
+        km = self._known.get(key)
+        if km is None:
+            from_a, from_b = self._from_origin.get(a, 0.0), self._from_origin.get(b, 0.0)
+            km = math.sqrt(max(from_a * from_a + from_b * from_b - from_a * from_b, 0.0))
+        if len(self._cache) >= self.maxsize:
+            self._cache.clear()
+        self._cache[key] = km
+        return km
+
+
+class RoutePlanner:
+    """Cheapest-insertion planning of drop-off stops for pooled trips.
+
+    A trip's stops are its drop-offs in order, after leaving the origin. A new
+    group's destination is tried between every pair of consecutive stops, and
+    the position that adds the fewest km wins, within the detour limits.
+
+    Fares: the trip total is the per-seat fare of the whole route times the
+    seats taken, less POOL_DISCOUNT once the trip is shared. It is split by the
+    seat-km of each group's direct ride, and no group pays more than it would
+    alone. The route length is kept on the trip, so a quote only sums the
+    handful of groups on it.
+    """
+    POOL_DISCOUNT = 0.25
+
+    def __init__(self, matrix=None, max_detour_ratio=0.3, max_detour_km=5.0, pickup_window=timedelta(minutes=15)):
+        self.matrix = matrix or DistanceMatrix()
+        self.max_detour_ratio = max_detour_ratio  # Extra km allowed, relative to the current route
+        self.max_detour_km = max_detour_km
+        self.pickup_window = pickup_window  # How far a shared trip's pickup may be from the requested one
+
+    def candidate_trips(self, pickup_time, limit=50):
+        """Return up to limit pending trips picking up within pickup_window of pickup_time.
+
+        Advance bookings released early are pending long before their pickup,
+        so without the window they would crowd out the trips leaving now.
+        """
+        trips, _ = trip_index.query(
+            status="pending", start=pickup_time - self.pickup_window, end=pickup_time + self.pickup_window,
+            page_size=limit,
+        )
+        return trips
+
+    def route_length(self, stops):
+        """Return the km from the origin through every stop in order."""
+        previous, total = ORIGIN, 0.0
+        for stop in stops:
+            place = place_key(stop["destination"])
+            self.matrix.add_place(place, stop["distance"])
+            total += self.matrix.distance(previous, place)
+            previous = place
+        return round(total, 3)
+
+    @staticmethod
+    def stops_of(trip):
+        """Return a stored trip's stops; single-stop trips predate the stops field."""
+        return trip.get("stops") or [{"destination": trip["route"], "distance": trip["distance"]}]
+
+    @staticmethod
+    def solo_fare(distance, group_size):
+        return Trip.calculate_base_fare(distance) * group_size
+
+    def _cheapest_insertion(self, stops, place):
+        """Return (added km, position, whether the stop is new) for dropping off at place.
+
+        The existing stops keep their order; a place already on the route costs nothing.
+        """
+        distance = self.matrix.distance
+        previous = ORIGIN
+        best_added, best_position = None, len(stops)
+        for position, stop in enumerate(stops):
+            if stop == place:
+                return 0.0, position, False
+            added = distance(previous, place) + distance(place, stop) - distance(previous, stop)
+            if best_added is None or added < best_added:
+                best_added, best_position = added, position
+            previous = stop
+        added = distance(previous, place)  # After the last stop
+        if best_added is None or added < best_added:
+            best_added, best_position = added, len(stops)
+        return best_added, best_position, True
+
+    def evaluate(self, trip, destination, distance, group_size):
+        """Quote adding a group to a stored pending trip; return None if it does not fit.
+
+        The quote holds the insertion position, the added km, the new route
+        length, and the fare of every group on the trip, ending with the new one.
+        """
+        if trip.get("status") != "pending" or trip.get("available_seats", 0) < group_size:
+            return None
+        stops = self.stops_of(trip)
+        for stop in stops:
+            self.matrix.add_place(place_key(stop["destination"]), stop["distance"])
+        place = place_key(destination)
+        self.matrix.add_place(place, distance)
+
+        added_km, position, new_stop = self._cheapest_insertion(
+            [place_key(stop["destination"]) for stop in stops], place
+        )
+        if not new_stop:
+            destination = stops[position]["destination"]  # Keep the stop's stored spelling
+        route_km = trip["distance"]
+        if added_km > self.max_detour_km or added_km > self.max_detour_ratio * route_km:
+            return None
+
+        groups = trip.get("passenger_groups", [])
+        # Groups stored without their own drop-off ride to the trip's destination
+        own_stop_km = next((stop["distance"] for stop in stops if stop["destination"] == trip["route"]), route_km)
+        direct = [(group.get("distance", own_stop_km), group["group_size"]) for group in groups]
+        direct.append((distance, group_size))
+        weight = sum(km * size for km, size in direct)
+        seats = sum(size for _, size in direct)
+        total = Trip.calculate_base_fare(route_km + added_km) * seats
+        if len(direct) > 1:
+            total *= 1 - self.POOL_DISCOUNT
+        fares = [
+            round(min(self.solo_fare(km, size), total * km * size / weight if weight else 0.0), 2)
+            for km, size in direct
+        ]
+        return {
+            "trip_id": trip["trip_id"],
+            "destination": destination,
+            "distance": distance,
+            "position": position,
+            "new_stop": new_stop,
+            "added_km": round(added_km, 3),
+            "route_km": round(route_km + added_km, 3),
+            "fares": fares,
+            "fare": fares[-1],
+            "solo_fare": self.solo_fare(distance, group_size),
+        }
+
+    def best_trip(self, trips, destination, distance, group_size):
+        """Return (trip, quote) for the pending trip that takes the group for the smallest detour, or (None, None)."""
+        best_trip, best_quote = None, None
+        for trip in trips:
+            quote = self.evaluate(trip, destination, distance, group_size)
+            if quote is not None and (best_quote is None or quote["added_km"] < best_quote["added_km"]):
+                best_trip, best_quote = trip, quote
+        return best_trip, best_quote
+
+
+route_planner = RoutePlanner()
@@ -0,0 +1,237 @@
+"""Advance bookings released to dispatch ahead of pickup."""
+import heapq
+import json
+import os
+import sys
+import threading
+import uuid
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+
+from .booking import booking_ledger
+from .models import fetch_passenger
+from .pipeline import BookingPipeline
+
+
+class _ThreadOutput:
+    """Stand-in for sys.stdout that sends some threads' output to a log file and passes the rest to the console."""
+    def __init__(self, console, threads, log):
+        self.console = console
+        self.threads = set(threads)
+        self.log = log
+
+    def write(self, text):
+        if threading.current_thread() in self.threads:
+            self.log.write(text)
+            self.log.flush()
+            return len(text)
+        return self.console.write(text)
+
+    def __getattr__(self, name):
+        return getattr(self.console, name)
+
+
+class TripScheduler:
+    """Advance bookings kept in a min-heap and released to dispatch before pickup.
+
+    Scheduling is O(log n). A tick that finds nothing due is O(1), because it
+    only peeks at the earliest release time. Bookings are persisted to an
+    append-only journal, so an insert never rewrites the whole file. Due
+    bookings are booked through a BookingPipeline, all queued before any is
+    awaited. start() ticks from a daemon thread, so bookings are released even
+    when nobody is using the menus. What that thread and the pipeline print
+    (booking confirmations, errors) goes to log_file, not into the session that
+    holds the terminal.
+    """
+    TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+    def __init__(self, filename="scheduled_trips.jsonl", lead_time=timedelta(minutes=15),
+                 retry_delay=timedelta(minutes=1), interval=30, log_file="scheduler.log"):
+        self.filename = filename
+        self.lead_time = lead_time  # How long before pickup a booking is dispatched
+        self.retry_delay = retry_delay  # Wait before retrying when no driver is free
+        self.interval = interval  # Seconds between background ticks
+        self.log_file = log_file
+        self._output = None
+        self._pipeline = None
+        self._heap = []  # (release_at, booking_id)
+        self._bookings = {}  # booking_id -> booking
+        self._loaded = False
+        self._lock = threading.RLock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def _load(self):
+        """Replay the journal into the heap, compacting it when mostly finished."""
+        if self._loaded:
+            return
+        self._loaded = True
+        finished = 0
+        try:
+            with open(self.filename, "r") as file:
+                for line in file:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # Skip a torn final line
+                    if entry["op"] == "add":
+                        self._bookings[entry["booking"]["booking_id"]] = entry["booking"]
+                    elif self._bookings.pop(entry["booking_id"], None) is not None:
+                        finished += 1
+        except FileNotFoundError:
+            return
+
+        self._heap = [(booking["release_at"], booking_id) for booking_id, booking in self._bookings.items()]
+        heapq.heapify(self._heap)
+        if finished > len(self._bookings):
+            self._rewrite_journal()
+
+    def _append(self, entry):
+        with open(self.filename, "a") as file:
+            file.write(json.dumps(entry) + "\n")
+
+    def _rewrite_journal(self):
+        temp_path = self.filename + ".tmp"
+        with open(temp_path, "w") as file:
+            for booking in self._bookings.values():
+                file.write(json.dumps({"op": "add", "booking": booking}) + "\n")
+        os.replace(temp_path, self.filename)
+
+    def schedule(self, passenger, route, distance, group_size, payment_method, pickup_time):
+        """Store an advance booking and return it."""
+        release_at = (pickup_time - self.lead_time).strftime(self.TIME_FORMAT)
+        booking = {
+            "booking_id": str(uuid.uuid4()),
+            "passenger_id": passenger._id,
+            "route": route,
+            "distance": distance,
+            "group_size": group_size,
+            "payment_method": payment_method,
+            "pickup_time": pickup_time.strftime(self.TIME_FORMAT),
+            "release_at": release_at,
+        }
+        with self._lock:
+            self._load()
+            self._bookings[booking["booking_id"]] = booking
+            heapq.heappush(self._heap, (release_at, booking["booking_id"]))
+            self._append({"op": "add", "booking": booking})
+        return booking
+
+    def cancel(self, booking_id):
+        """Cancel an advance booking before it is released."""
+        with self._lock:
+            self._load()
+            if self._bookings.pop(booking_id, None) is None:
+                return False
+            self._append({"op": "cancel", "booking_id": booking_id})
+            return True  # The heap entry is skipped lazily when it surfaces
+
+    def get_bookings(self, passenger_id):
+        """Return a passenger's unreleased advance bookings, earliest first."""
+        with self._lock:
+            self._load()
+            bookings = [b for b in self._bookings.values() if b["passenger_id"] == passenger_id]
+        return sorted(bookings, key=lambda booking: booking["pickup_time"])
+
+    def tick(self, now=None, dispatch=None):
+        """Release every booking whose release time has passed; return how many were dispatched.
+
+        dispatch(booking) returns a Future resolving to True once the booking is
+        handled, or False to try it again after retry_delay.
+        """
+        now = (now or datetime.now()).strftime(self.TIME_FORMAT)
+        dispatch = dispatch or self.dispatch_booking
+        released = 0
+        with self._lock:
+            self._load()
+            due = []
+            while self._heap and self._heap[0][0] <= now:
+                release_at, booking_id = heapq.heappop(self._heap)
+                booking = self._bookings.get(booking_id)
+                if booking is None or booking["release_at"] != release_at:
+                    continue  # Canceled or rescheduled
+                due.append(booking)
+
+            handled = [dispatch(booking) for booking in due]  # Queued together, so they overlap in the pipeline
+            for booking, future in zip(due, handled):
+                if future.result():
+                    del self._bookings[booking["booking_id"]]
+                    self._append({"op": "released", "booking_id": booking["booking_id"]})
+                    released += 1
+                else:
+                    # No driver yet: try again shortly, without blocking later bookings
+                    retry_at = datetime.strptime(now, self.TIME_FORMAT) + self.retry_delay
+                    booking["release_at"] = retry_at.strftime(self.TIME_FORMAT)
+                    heapq.heappush(self._heap, (booking["release_at"], booking["booking_id"]))
+                    self._append({"op": "add", "booking": booking})
+        return released
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                released = self.tick()
+                if released:
+                    print(f"{datetime.now():%Y-%m-%d %H:%M:%S} {released} scheduled trip(s) released for dispatch.")
+            except OSError as e:
+                print(f"Error while releasing scheduled trips: {e}")
+            self._stop_event.wait(self.interval)
+
+    def start(self):
+        """Start releasing due bookings in a daemon thread."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="trip-scheduler", daemon=True)
+            threads = [self._thread, *self._booking_pipeline().threads()]
+            self._output = _ThreadOutput(sys.stdout, threads, open(self.log_file, "a"))
+            sys.stdout = self._output
+            self._thread.start()
+
+    def stop(self):
+        """Stop the background thread after its current tick."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._pipeline is not None:
+            self._pipeline.close()
+            self._pipeline = None
+        if self._output is not None:
+            if sys.stdout is self._output:
+                sys.stdout = self._output.console
+            self._output.log.close()
+            self._output = None
+
+    def _booking_pipeline(self):
+        if self._pipeline is None:
+            self._pipeline = BookingPipeline()
+        return self._pipeline
+
+    def dispatch_booking(self, booking):
+        """Queue a released advance booking on the booking pipeline.
+
+        Returns a Future resolving to True once the booking is handled, or to
+        False when no driver was free (or it was shed) and it should be retried.
+        The booking ID is the idempotency key, so a release retried after a
+        crash never books the passenger twice.
+        """
+        handled = Future()
+        passenger = fetch_passenger(booking["passenger_id"])
+        if passenger is None:
+            print(f"Error: Passenger for scheduled trip {booking['booking_id']} not found. Dropping it.")
+            handled.set_result(True)
+            return handled
+
+        key = booking["booking_id"]
+
+        def done(future):
+            if future.exception() is not None:
+                print(f"Error booking scheduled trip {key}: {future.exception()}")
+            entry = booking_ledger.get(key)
+            handled.set_result(entry is not None and entry["state"] == "done")
+
+        self._booking_pipeline().submit(
+            passenger, booking["route"], booking["distance"], booking["group_size"], booking["payment_method"],
+            idempotency_key=key, start_time=datetime.strptime(booking["pickup_time"], self.TIME_FORMAT),
+        ).add_done_callback(done)
+        return handled
+
+trip_scheduler = TripScheduler()
@@ -0,0 +1,305 @@
+"""Seeded discrete-event simulation of a day of city traffic."""
+import contextlib
+import heapq
+import io
+import os
+import random
+import tempfile
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+from .models import Driver, Passenger, Trip, Vehicle, find_available_driver
+from .routing import route_planner
+from .storage import trip_store
+
+
+class CitySimulator:
+    """Replays a city's ride demand on a simulated clock using the real booking code.
+
+    Passengers arrive following an hourly demand curve and are dispatched the
+    way the menu does it: RoutePlanner offers a seat on a pending trip when
+    sharing is cheaper, otherwise find_available_driver picks a driver from
+    DriverAvailability. With no driver free the request waits in a queue
+    until one frees up or the passenger gives up. A driver handed a trip
+    while heading to another pickup serves the trips in order. Bookings go
+    through Passenger.book_trip, drivers start and end trips through
+    Driver.start_trip/end_trip, and some passengers cancel before pickup.
+    Every trip file operation is real, so the storage counts match
+    production. The data lives in a scratch directory that is removed
+    afterwards.
+
+    The same seed and settings always produce the same report.
+    """
+    # Share of the peak request rate for each hour of the day
+    DEMAND_CURVE = (
+        0.15, 0.10, 0.08, 0.08, 0.12, 0.30, 0.65, 1.00, 0.95, 0.70, 0.55, 0.60,
+        0.70, 0.60, 0.55, 0.65, 0.85, 1.00, 0.95, 0.75, 0.55, 0.45, 0.35, 0.25,
+    )
+    ROUTES = ("Downtown A", "Uptown B", "City Center C", "Airport", "Mall", "University", "Harbor", "Old Town")
+    PAYMENT_METHODS = ("GCash", "PayPal", "Debit")
+    START = datetime(2024, 6, 3)  # Simulated day starts at midnight
+
+    def __init__(self, seed=0, hours=24, drivers=40, passengers=400, peak_requests_per_hour=120,
+                 cancel_rate=0.05, patience_minutes=15, speed_kmh=25):
+        self.seed = seed
+        self.hours = hours
+        self.driver_count = drivers
+        self.passenger_count = passengers
+        self.peak_requests_per_hour = peak_requests_per_hour
+        self.cancel_rate = cancel_rate  # Share of bookings canceled before pickup
+        self.patience_minutes = patience_minutes  # How long a request waits for a driver
+        self.speed_kmh = speed_kmh
+
+    # --- Setup ---
+
+    def _setup(self):
+        self.rng = random.Random(self.seed)
+        self._events = []  # (minute, sequence, kind, payload)
+        self._sequence = 0
+        self._waiting = deque()  # Requests with no driver yet, oldest first
+        self._entries = {}  # trip_id -> sim trip entry
+        self._driver_trips = {}  # driver index -> its pending and in-progress entries, in serving order
+        self._busy_since = {}  # driver index -> minute the driver was first assigned
+        self.route_distances = {route: round(self.rng.uniform(2, 25), 1) for route in self.ROUTES}
+        self.hourly = [
+            {
+                "hour": hour, "requests": 0, "booked": 0, "pooled": 0, "canceled": 0, "abandoned": 0,
+                "completed": 0, "waits": [], "busy_minutes": 0.0, "seats_taken": 0, "seats_offered": 0,
+                "reads": 0, "writes": 0,
+            }
+            for hour in range(self.hours)
+        ]
+
+        with contextlib.redirect_stdout(io.StringIO()):  # The booking code reports to the console
+            self.drivers = []
+            for index in range(self.driver_count):
+                vehicle = Vehicle(f"SIM{index:04d}", "Toyota", "White", seats=self.rng.choice((4, 4, 4, 6)))
+                driver = Driver("Driver", str(index), f"0917{index:07d}", vehicle)
+                driver.save_to_file("drivers.json")
+                self.drivers.append(driver)
+            self._driver_index = {driver._id: index for index, driver in enumerate(self.drivers)}
+            self.passengers = [
+                Passenger("Passenger", str(index), f"0918{index:07d}") for index in range(self.passenger_count)
+            ]
+            for passenger in self.passengers:
+                passenger.save_to_file("passengers.json")
+
+    def _schedule(self, minute, kind, payload=None):
+        self._sequence += 1
+        heapq.heappush(self._events, (minute, self._sequence, kind, payload))
+
+    def _clock(self, minute):
+        return self.START + timedelta(minutes=minute)
+
+    def _bucket(self, minute):
+        return self.hourly[min(int(minute // 60), self.hours - 1)]
+
+    # --- Drivers ---
+
+    def _assign(self, index, entry, minute):
+        """Queue a trip for a driver; the driver heads to its pickup once earlier trips are done."""
+        trips = self._driver_trips.setdefault(index, [])
+        trips.append(entry)
+        if len(trips) == 1:
+            self._busy_since[index] = minute
+            self._schedule_pickup(entry, minute)
+
+    def _schedule_pickup(self, entry, minute):
+        entry["pickup_at"] = minute + self.rng.uniform(3, 10)
+        self._schedule(entry["pickup_at"], "pickup", entry)
+
+    def _finish(self, entry, minute):
+        """Take a completed or canceled trip off its driver, then start the next one or mark the driver free."""
+        index = entry["driver"]
+        trips = self._driver_trips[index]
+        was_next = trips[0] is entry
+        trips.remove(entry)
+        if not trips:
+            del self._driver_trips[index]
+            self._add_busy_time(self._busy_since.pop(index), minute)
+        elif was_next:
+            self._schedule_pickup(trips[0], minute)
+        self._serve_waiting(minute)
+
+    def _add_busy_time(self, start, end):
+        while start < end:
+            hour_end = (start // 60 + 1) * 60
+            self._bucket(start)["busy_minutes"] += min(end, hour_end) - start
+            start = hour_end
+
+    # --- Requests ---
+
+    def _on_arrival(self, minute, _):
+        rate = self.peak_requests_per_hour * self.DEMAND_CURVE[int(minute // 60) % 24]
+        self._schedule(minute + self.rng.expovariate(rate / 60), "arrival")
+
+        route = self.rng.choice(self.ROUTES)
+        request = {
+            "passenger": self.rng.choice(self.passengers),
+            "route": route,
+            "distance": self.route_distances[route],
+            "group_size": self.rng.choice((1, 1, 1, 2, 2, 3)),
+            "payment_method": self.rng.choice(self.PAYMENT_METHODS),
+            "requested_at": minute,
+        }
+        self._bucket(minute)["requests"] += 1
+        if not self._dispatch(request, minute):
+            self._waiting.append(request)
+            self._schedule(minute + self.patience_minutes, "abandon", request)
+
+    def _dispatch(self, request, minute, candidates=50):
+        """Share a pending trip when RoutePlanner makes it cheaper, otherwise book a trip with an available driver."""
+        pending_trips = route_planner.candidate_trips(self._clock(minute), candidates)
+        record, stop = route_planner.best_trip(
+            pending_trips, request["route"], request["distance"], request["group_size"]
+        )
+        if record is not None and stop["fare"] < stop["solo_fare"] and record["trip_id"] in self._entries:
+            self._book(request, self._entries[record["trip_id"]], minute, stop)
+            self._bucket(minute)["pooled"] += 1
+            return True
+
+        driver = find_available_driver()
+        if driver is None:
+            return False
+        index = self._driver_index[driver._id]
+        entry = {"driver": index, "state": "pending", "pickup_at": None}
+        self._assign(index, entry, minute)  # Plans the pickup when the driver has nothing else queued
+        entry["trip"] = trip = Trip(request["route"], request["distance"], self.drivers[index],
+                                    start_time=self._clock(entry["pickup_at"] or minute))
+        self._entries[trip.trip_id] = entry
+        self._book(request, entry, minute)
+        self.drivers[index].add_pending_trip(trip)
+        return True
+
+    def _book(self, request, entry, minute, stop=None):
+        request["entry"] = entry
+        entry.setdefault("requests", []).append(request)
+        request["passenger"].book_trip(entry["trip"], request["group_size"], request["payment_method"], stop=stop)
+        self._bucket(minute)["booked"] += 1
+        if self.rng.random() < self.cancel_rate:
+            cancel_by = entry["pickup_at"] or minute + self.patience_minutes  # Pickup not yet planned
+            self._schedule(self.rng.uniform(minute, cancel_by), "cancel", request)
+
+    def _serve_waiting(self, minute):
+        while self._waiting:
+            request = self._waiting[0]
+            if not request.get("abandoned") and not self._dispatch(request, minute):
+                return  # Nobody can take the oldest request yet
+            self._waiting.popleft()
+
+    def _on_abandon(self, minute, request):
+        if "entry" not in request:
+            request["abandoned"] = True
+            self._waiting.remove(request)
+            self._bucket(minute)["abandoned"] += 1
+
+    def _on_cancel(self, minute, request):
+        entry = request["entry"]
+        if entry["state"] != "pending":
+            return  # Already picked up
+        trip = entry["trip"]
+        if trip.cancel_trip(request["passenger"]):
+            for booked in entry["requests"]:
+                if booked["passenger"] is request["passenger"]:
+                    booked["canceled"] = True  # cancel_trip drops all of the passenger's groups
+            self._bucket(minute)["canceled"] += 1
+            if trip.status == "canceled":
+                entry["state"] = "canceled"
+                self._finish(entry, minute)
+            else:
+                self._serve_waiting(minute)  # Seats freed up on a shared trip
+
+    # --- Trips ---
+
+    def _on_pickup(self, minute, entry):
+        if entry["state"] != "pending":
+            return  # Every group canceled
+        entry["state"] = "in-progress"
+        trip = entry["trip"]
+        self.drivers[entry["driver"]].start_trip(trip.trip_id)
+
+        bucket = self._bucket(minute)
+        bucket["seats_taken"] += trip.capacity - trip.available_seats
+        bucket["seats_offered"] += trip.capacity
+        for request in entry["requests"]:
+            if not request.get("canceled"):
+                bucket["waits"].append(minute - request["requested_at"])
+        self._schedule(minute + trip.distance / self.speed_kmh * 60, "dropoff", entry)
+
+    def _on_dropoff(self, minute, entry):
+        entry["state"] = "completed"
+        self.drivers[entry["driver"]].end_trip(entry["trip"].trip_id)
+        self._bucket(minute)["completed"] += 1
+        self._finish(entry, minute)
+
+    # --- Run ---
+
+    def run(self):
+        """Run the simulation in a scratch directory and return one stats dict per simulated hour."""
+        if trip_store._ready:
+            print("Error: The simulation needs a fresh process; trip data is already loaded here.")
+            return None
+
+        original_directory = os.getcwd()
+        with tempfile.TemporaryDirectory(prefix="rideshare-sim-") as directory:
+            os.chdir(directory)
+            try:
+                started = time.perf_counter()
+                self._simulate()
+                self.wall_seconds = time.perf_counter() - started
+            finally:
+                os.chdir(original_directory)
+        return self.report()
+
+    def _simulate(self):
+        self._setup()
+        end = self.hours * 60
+        self._schedule(0.0, "arrival")
+        handlers = {
+            "arrival": self._on_arrival, "abandon": self._on_abandon, "cancel": self._on_cancel,
+            "pickup": self._on_pickup, "dropoff": self._on_dropoff,
+        }
+        hour = 0
+        counts = dict(trip_store.op_counts)
+        with contextlib.redirect_stdout(io.StringIO()):
+            while self._events and self._events[0][0] < end:
+                minute, _, kind, payload = heapq.heappop(self._events)
+                while minute >= (hour + 1) * 60:
+                    counts = self._close_hour(hour, counts)
+                    hour += 1
+                handlers[kind](minute, payload)
+        while hour < self.hours:
+            counts = self._close_hour(hour, counts)
+            hour += 1
+        for since in self._busy_since.values():
+            self._add_busy_time(since, end)  # Drivers still on a trip when the day ends
+
+    def _close_hour(self, hour, counts):
+        """Attribute the storage operations since the last hour boundary to this hour."""
+        current = dict(trip_store.op_counts)
+        self.hourly[hour]["reads"] = current["reads"] - counts["reads"]
+        self.hourly[hour]["writes"] = current["writes"] - counts["writes"]
+        return current
+
+    def report(self):
+        """Return per-hour utilisation, wait times, seat fill and storage operation counts."""
+        rows = []
+        for bucket in self.hourly:
+            waits = bucket["waits"]
+            rows.append({
+                "hour": bucket["hour"],
+                "requests": bucket["requests"],
+                "booked": bucket["booked"],
+                "pooled": bucket["pooled"],
+                "canceled": bucket["canceled"],
+                "abandoned": bucket["abandoned"],
+                "completed": bucket["completed"],
+                "utilisation": bucket["busy_minutes"] / (60 * self.driver_count),
+                "avg_wait_minutes": sum(waits) / len(waits) if waits else 0.0,
+                "max_wait_minutes": max(waits) if waits else 0.0,
+                "seat_fill": bucket["seats_taken"] / bucket["seats_offered"] if bucket["seats_offered"] else 0.0,
+                "storage_reads": bucket["reads"],
+                "storage_writes": bucket["writes"],
+            })
+        return rows
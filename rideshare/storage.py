@@ -0,0 +1,435 @@
+"""Sharded trip storage and its background compaction job."""
+import json
+import lzma
+import os
+import struct
+import threading
+import zlib
+from datetime import datetime
+
+from .cache import profile_cache
+from .formats import decode_records, get_codec
+
+
+class TripStore:
+    """Sharded trip storage: active trips by driver hash, finished trips by month."""
+    ACTIVE_STATUSES = ("pending", "in-progress")
+
+    def __init__(self, root="trips", shard_count=16, legacy_file="trips.json", codec=None):
+        self.root = root
+        self.shard_count = shard_count
+        self.legacy_file = legacy_file
+        self.codec = codec or get_codec()  # Storage format, independent of get_trip_details
+        self._ready = False
+        self._index = None  # Archive index, loaded on first use
+        self._index_signature = None  # Index file (mtime, size) when it was loaded or saved
+        self._open_month_ids = {}  # month -> IDs of the trips in its open shard, loaded on demand
+        self._lock = threading.RLock()  # Serializes writers (menu and compaction job)
+        self._listeners = []  # Called with every saved trip
+        self.op_counts = {"reads": 0, "writes": 0}  # Shard file operations, for load testing
+
+    def _ensure_layout(self):
+        """Create the shard directories and migrate trips.json once."""
+        if self._ready:
+            return
+        with self._lock:
+            if self._ready:
+                return
+            self._ready = True
+            os.makedirs(os.path.join(self.root, "active"), exist_ok=True)
+            os.makedirs(os.path.join(self.root, "archive"), exist_ok=True)
+
+            # One-time migration of the monolithic trips.json into shards
+            if os.path.exists(self.legacy_file):
+                legacy_trips = self._read_records(self.legacy_file)
+                self.save_trips(legacy_trips)
+                os.replace(self.legacy_file, self.legacy_file + ".bak")
+
+            self._convert_shards()
+
+    def _convert_shards(self):
+        """Rewrite shards left in another codec's format after the codec setting changed."""
+        for folder in ("active", "archive"):
+            directory = os.path.join(self.root, folder)
+            for name in os.listdir(directory):
+                closed = name.endswith(".xz")
+                stem, extension = os.path.splitext(name[:-len(".xz")] if closed else name)
+                if extension == self.codec.extension or stem == "index" or extension == ".tmp":
+                    continue
+                path = os.path.join(directory, name)
+                converted = os.path.join(directory, stem + self.codec.extension + (".xz" if closed else ""))
+                self._write_records(converted, self._read_records(path))
+                os.remove(path)
+
+    def add_listener(self, callback):
+        """Call callback(trip) after every trip save, to keep derived state current."""
+        self._listeners.append(callback)
+
+    # --- Routing ---
+
+    def shard_for_driver(self, driver_id):
+        """Return the active shard number for a driver (stable across runs)."""
+        return zlib.crc32(driver_id.encode("utf-8")) % self.shard_count
+
+    def _active_path(self, shard):
+        return os.path.join(self.root, "active", f"shard_{shard:02d}{self.codec.extension}")
+
+    @staticmethod
+    def _month_of(trip):
+        """Month key (YYYY-MM) used to file a finished trip."""
+        return (trip.get("start_time") or datetime.now().strftime("%Y-%m"))[:7]
+
+    def _archive_path(self, month, closed=False):
+        suffix = self.codec.extension + (".xz" if closed else "")
+        return os.path.join(self.root, "archive", f"{month}{suffix}")
+
+    def _index_path(self):
+        return os.path.join(self.root, "archive", "index.json")
+
+    def _archive_months(self):
+        """Return (month, closed) pairs for every archive shard, oldest first."""
+        months = []
+        closed_suffix = self.codec.extension + ".xz"
+        for name in sorted(os.listdir(os.path.join(self.root, "archive"))):
+            if name.endswith(closed_suffix):
+                months.append((name[:-len(closed_suffix)], True))
+            elif name.endswith(self.codec.extension) and name != "index.json":
+                months.append((name[:-len(self.codec.extension)], False))
+        return months
+
+    def _open_months(self):
+        return [month for month, closed in self._archive_months() if not closed]
+
+    # --- Low-level shard I/O ---
+
+    def _read_records(self, path):
+        """Read a list of records from a (possibly compressed) shard file in any codec."""
+        self.op_counts["reads"] += 1
+        opener = lzma.open if path.endswith(".xz") else open
+        try:
+            with opener(path, "rb") as file:
+                records = decode_records(file.read())
+        except (FileNotFoundError, ValueError, struct.error, lzma.LZMAError):
+            return []
+        return records if isinstance(records, list) else []
+
+    def _write_records(self, path, records):
+        """Atomically replace a shard file with the given records."""
+        self.op_counts["writes"] += 1
+        opener = lzma.open if path.endswith(".xz") else open
+        temp_path = path + ".tmp"
+        with opener(temp_path, "wb") as file:
+            file.write(self.codec.encode(records))
+        os.replace(temp_path, path)
+
+    # --- Archive index ---
+
+    @staticmethod
+    def _signature(path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load_index(self):
+        """Return the archive index, rebuilding it from the closed segments if missing.
+
+        The index is read again when another process has rewritten it.
+        """
+        signature = self._signature(self._index_path())
+        if self._index is not None and signature == self._index_signature:
+            return self._index
+        try:
+            with open(self._index_path(), "r") as file:
+                self._index = json.load(file)
+            self._index_signature = signature
+        except (FileNotFoundError, json.JSONDecodeError):
+            self._index = {"trips": {}, "drivers": {}, "passengers": {}}
+            for month, closed in self._archive_months():
+                if closed:
+                    self._index_trips(month, self._read_records(self._archive_path(month, closed=True)))
+            self._save_index()
+        return self._index
+
+    def _index_trips(self, month, trips):
+        """Record which closed segment holds each trip, driver and passenger."""
+        index = self._index
+        for trip in trips:
+            index["trips"][trip["trip_id"]] = month
+            months = index["drivers"].setdefault(trip["driver_id"], [])
+            if month not in months:
+                months.append(month)
+            for group in trip.get("passenger_groups", []):
+                months = index["passengers"].setdefault(group["passenger_id"], [])
+                if month not in months:
+                    months.append(month)
+
+    def _save_index(self):
+        temp_path = self._index_path() + ".tmp"
+        with open(temp_path, "w") as file:
+            json.dump(self._index, file)
+        os.replace(temp_path, self._index_path())
+        self._index_signature = self._signature(self._index_path())
+
+    def _is_finished(self, trip_id, month):
+        """Whether the trip is already filed as finished under the month its start time falls in."""
+        if self._load_index()["trips"].get(trip_id) == month:
+            return True
+        trip_ids = self._open_month_ids.get(month)
+        if trip_ids is None:
+            trip_ids = self._open_month_ids[month] = {
+                trip["trip_id"] for trip in self._read_records(self._archive_path(month))
+            }
+        return trip_id in trip_ids
+
+    def _finished_trips(self, closed_months=(), since_month=""):
+        """Return trips from every open month (from since_month on) plus the given closed segments."""
+        trips = []
+        for month in self._open_months():
+            if month >= since_month:
+                trips.extend(self._read_records(self._archive_path(month)))
+        for month in sorted(set(closed_months)):
+            trips.extend(self._read_records(self._archive_path(month, closed=True)))
+        return trips
+
+    # --- Queries ---
+
+    def get_active_trips(self, driver_id=None, status=None):
+        """Return pending/in-progress trips, reading only the driver's shard when given."""
+        self._ensure_layout()
+        if driver_id is not None:
+            shards = [self.shard_for_driver(driver_id)]
+        else:
+            shards = range(self.shard_count)
+
+        trips = []
+        for shard in shards:
+            for trip in self._read_records(self._active_path(shard)):
+                if driver_id is not None and trip.get("driver_id") != driver_id:
+                    continue
+                if status is not None and trip.get("status") != status:
+                    continue
+                trips.append(trip)
+        return trips
+
+    def get_finished_trips(self, include_closed=False, since=None):
+        """Return completed/canceled trips from the month shards.
+
+        With since (a datetime), months before its month are not read at all.
+        """
+        self._ensure_layout()
+        since_month = since.strftime("%Y-%m") if since is not None else ""
+        closed_months = []
+        if include_closed:
+            closed_months = [month for month, closed in self._archive_months() if closed and month >= since_month]
+        return self._finished_trips(closed_months, since_month)
+
+    def iter_trip_batches(self):
+        """Yield the trips of each shard file in turn (active shards, then months oldest first).
+
+        Only one shard is held in memory at a time, for full scans of large stores.
+        """
+        self._ensure_layout()
+        for shard in range(self.shard_count):
+            yield self._active_path(shard), self._read_records(self._active_path(shard))
+        for month, closed in self._archive_months():
+            yield self._archive_path(month, closed), self._read_records(self._archive_path(month, closed))
+
+    def closed_months(self, driver_id=None, passenger_id=None):
+        """Return the closed months, oldest first, that the archive index lists for the driver and passenger."""
+        self._ensure_layout()
+        with self._lock:
+            index = self._load_index()
+            months = {month for month, closed in self._archive_months() if closed}
+            if driver_id is not None:
+                months &= set(index["drivers"].get(driver_id, []))
+            if passenger_id is not None:
+                months &= set(index["passengers"].get(passenger_id, []))
+        return sorted(months)
+
+    def shard_signatures(self, closed_months=()):
+        """Return {shard key: (mtime, size)} for the active shards, the open months and the given closed months.
+
+        Keys are ("active", shard number), ("open", month) or ("closed", month);
+        files that do not exist are left out.
+        """
+        self._ensure_layout()
+        keys = [("active", shard) for shard in range(self.shard_count)]
+        keys += [("open", month) for month in self._open_months()]
+        keys += [("closed", month) for month in closed_months]
+        signatures = {}
+        for key in keys:
+            signature = self._signature(self._shard_path(key))
+            if signature is not None:
+                signatures[key] = signature
+        return signatures
+
+    def read_shard(self, key):
+        """Return the trips in the shard file for a shard_signatures() key."""
+        self._ensure_layout()
+        return self._read_records(self._shard_path(key))
+
+    def _shard_path(self, key):
+        kind, name = key
+        return self._active_path(name) if kind == "active" else self._archive_path(name, closed=kind == "closed")
+
+    def get_trip(self, trip_id, driver_id=None):
+        """Find a single trip, looking in the active shards before the archive."""
+        for trip in self.get_active_trips(driver_id):
+            if trip["trip_id"] == trip_id:
+                return trip
+        closed_month = self._load_index()["trips"].get(trip_id)
+        for trip in self._finished_trips([closed_month] if closed_month else []):
+            if trip["trip_id"] == trip_id:
+                return trip
+        return None
+
+    # --- Writes ---
+
+    def save_trip(self, trip):
+        """Insert or update a single trip record in the shard it belongs to."""
+        self.save_trips([trip])
+
+    def save_trips(self, trips):
+        """Insert or update trip records, writing each touched shard once.
+
+        A completed or canceled trip is never moved back to an active status:
+        such a save comes from a stale Trip object and is refused.
+        """
+        self._ensure_layout()
+        # One lock across the check and the writes, so a trip cannot end in between and be reopened
+        with self._lock:
+            reopened = [
+                trip for trip in trips
+                if trip.get("status") in self.ACTIVE_STATUSES and self._is_finished(trip["trip_id"], self._month_of(trip))
+            ]
+            for trip in reopened:
+                print(f"Error: Trip {trip['trip_id']} has already ended; the outdated copy was not saved.")
+            if reopened:
+                trips = [trip for trip in trips if not any(trip is stale for stale in reopened)]
+
+            active_updates = {}
+            archive_updates = {}
+            for trip in trips:
+                shard = self.shard_for_driver(trip["driver_id"])
+                active_updates.setdefault(shard, {})[trip["trip_id"]] = trip
+                if trip.get("status") not in self.ACTIVE_STATUSES:
+                    archive_updates.setdefault(self._month_of(trip), {})[trip["trip_id"]] = trip
+
+            for shard, updates in active_updates.items():
+                path = self._active_path(shard)
+                existing = self._read_records(path)
+                kept = [trip for trip in existing if trip["trip_id"] not in updates]
+                kept.extend(
+                    trip for trip in updates.values()
+                    if trip.get("status") in self.ACTIVE_STATUSES
+                )
+                if kept != existing:
+                    self._write_records(path, kept)
+
+            for month, updates in archive_updates.items():
+                # A closed month is reopened in place so it stays compressed
+                closed = os.path.exists(self._archive_path(month, closed=True))
+                path = self._archive_path(month, closed)
+                kept = [trip for trip in self._read_records(path) if trip["trip_id"] not in updates]
+                kept.extend(updates.values())
+                self._write_records(path, kept)
+                if month in self._open_month_ids:
+                    self._open_month_ids[month].update(updates)
+                if closed:
+                    self._load_index()
+                    self._index_trips(month, updates.values())
+                    self._save_index()
+
+        # Trip state changed: drop cached views of everyone on these trips, now that the write is done
+        for trip in trips:
+            profile_cache.invalidate(
+                trip["driver_id"],
+                *(group["passenger_id"] for group in trip.get("passenger_groups", []))
+            )
+        for trip in trips:
+            for listener in self._listeners:
+                listener(trip)
+
+    def close_old_shards(self, current_month=None):
+        """Compress month shards older than the current month and index their trips."""
+        self._ensure_layout()
+        current_month = current_month or datetime.now().strftime("%Y-%m")
+        sealed = 0
+        with self._lock:
+            for month, closed in self._archive_months():
+                if closed or month >= current_month:
+                    continue
+                open_path = self._archive_path(month)
+                records = self._read_records(open_path)
+                closed_path = self._archive_path(month, closed=True)
+                records += self._read_records(closed_path)
+                self._write_records(closed_path, records)
+                os.remove(open_path)
+                self._open_month_ids.pop(month, None)
+
+                self._load_index()
+                self._index_trips(month, records)
+                self._save_index()
+                sealed += 1
+        return sealed
+
+
+trip_store = TripStore()
+
+
+class TripCompactor:
+    """Background job that keeps the hot trip shards small."""
+    def __init__(self, store, interval=300, legacy_files=("in_progress_trips.json",)):
+        self.store = store
+        self.interval = interval  # Seconds between compaction runs
+        self.legacy_files = legacy_files
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def run_once(self):
+        """Run one compaction pass and return what it did."""
+        stats = {"legacy_imported": 0, "moved_to_archive": 0, "segments_sealed": 0}
+
+        # Fold leftover legacy files into the store, then retire them
+        for legacy_file in self.legacy_files:
+            if os.path.exists(legacy_file):
+                legacy_trips = self.store._read_records(legacy_file)
+                if legacy_trips:
+                    self.store.save_trips(legacy_trips)
+                    stats["legacy_imported"] += len(legacy_trips)
+                os.remove(legacy_file)
+
+        # Move terminal-state trips that are still sitting in active shards
+        finished = [
+            trip for trip in self.store.get_active_trips()
+            if trip.get("status") not in TripStore.ACTIVE_STATUSES
+        ]
+        if finished:
+            self.store.save_trips(finished)
+            stats["moved_to_archive"] = len(finished)
+
+        stats["segments_sealed"] = self.store.close_old_shards()
+        return stats
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.run_once()
+            except OSError as e:
+                print(f"Error during trip compaction: {e}")
+            self._stop_event.wait(self.interval)
+
+    def start(self):
+        """Start compaction in a daemon thread."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="trip-compactor", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the background thread after its current pass."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()